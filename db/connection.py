@@ -2,8 +2,11 @@ import os
 import urllib.parse
 from dotenv import load_dotenv, find_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 
+from db.pool import TimedAsyncQueuePool, TimedQueuePool
+
 dotenv_path = find_dotenv()
 load_dotenv(dotenv_path)
 
@@ -13,29 +16,104 @@ DB_HOST = os.getenv("DB_HOST", "52.7.233.59")
 DB_PORT = os.getenv("DB_PORT", "3306")
 DB_NAME = os.getenv("DB_NAME", "data")
 
-DATABASE_URL = (
+# DATABASE_URL permite apuntar a una BD local (p.ej. sqlite:///local.db)
+DATABASE_URL = os.getenv("DATABASE_URL") or (
     f"mysql+pymysql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     "?charset=utf8mb4"
 )
 
+# Pool de conexiones configurable desde el entorno
+DB_POOL_SIZE     = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW  = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT  = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE  = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Conexiones que se abren al arrancar (por defecto, el tamaño del pool)
+DB_POOL_WARMUP   = int(os.getenv("DB_POOL_WARMUP", str(DB_POOL_SIZE)))
+
+def _pool_args(url: str, poolclass) -> dict:
+    # SQLite en memoria no usa un pool con cola; ahí se dejan los valores por defecto
+    u = make_url(url)
+    if u.get_backend_name() == "sqlite" and u.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,
-    connect_args={"charset": "utf8mb4"},
+    connect_args={"charset": "utf8mb4"} if DATABASE_URL.startswith("mysql") else {},
+    **_pool_args(DATABASE_URL, TimedQueuePool),
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Motor asíncrono: aiomysql en producción, aiosqlite para pruebas locales
+ASYNC_DRIVERS = {"mysql": "mysql+aiomysql", "sqlite": "sqlite+aiosqlite"}
+
+def _async_url(url: str) -> str:
+    u = make_url(url)
+    driver = ASYNC_DRIVERS.get(u.get_backend_name(), u.drivername)
+    return u.set(drivername=driver).render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
+
+_async_engine = None
+_async_sessionmaker = None
+
+def get_async_engine(create: bool = True):
+    # Se crea al primer uso para no exigir el driver async en modo síncrono
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None and create:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        _async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            pool_pre_ping=True,
+            **_pool_args(ASYNC_DATABASE_URL, TimedAsyncQueuePool),
+        )
+        _async_sessionmaker = async_sessionmaker(
+            _async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
+
 def create_tables():
     from models.camera   import CameraCapture
     from models.gas      import GasSensor
     from models.motion   import MotionSensor
     from models.particle import ParticleSensor
+    from models.rollup   import SensorRollup
     Base.metadata.create_all(bind=engine)
 
+def ensure_indexes():
+    """
+    create_all no añade índices a tablas que ya existen: crea los que
+    falten en las tablas actuales (idempotente).
+    """
+    from sqlalchemy import inspect
+    insp = inspect(engine)
+    created = []
+    for table in Base.metadata.sorted_tables:
+        if not insp.has_table(table.name):
+            continue
+        existing = {ix["name"] for ix in insp.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=engine)
+                created.append(index.name)
+    return created
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    get_async_engine()
+    async with _async_sessionmaker() as db:
+        yield db
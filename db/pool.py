@@ -0,0 +1,104 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+class PoolWaitStats:
+    """
+    Tiempo que las peticiones esperan para obtener una conexión del pool.
+    """
+
+    # Límites superiores (ms) de los cubos del histograma de espera
+    BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(self.BUCKETS_MS) + 1)
+
+    def record(self, wait_ms: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.total_ms += wait_ms
+            self.max_ms = max(self.max_ms, wait_ms)
+            i = 0
+            while i < len(self.BUCKETS_MS) and wait_ms > self.BUCKETS_MS[i]:
+                i += 1
+            self.buckets[i] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            labels = [f"<={b}ms" for b in self.BUCKETS_MS] + [f">{self.BUCKETS_MS[-1]}ms"]
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_mean_ms': self.total_ms / self.checkouts if self.checkouts else 0.0,
+                'wait_max_ms': self.max_ms,
+                'wait_histogram': dict(zip(labels, self.buckets)),
+            }
+
+class TimedPoolMixin:
+    # Mide la espera en _do_get, que es donde el pool bloquea si está agotado
+    wait_stats: PoolWaitStats
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            # Sólo el pool agotado cuenta como timeout; fallos al conectar
+            # (credenciales, red, DNS) se propagan sin contarse
+            self.wait_stats.record(0.0, timed_out=True)
+            raise
+        self.wait_stats.record((time.perf_counter() - t0) * 1000)
+        return conn
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    wait_stats = PoolWaitStats()
+
+class TimedAsyncQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    wait_stats = PoolWaitStats()
+
+def pool_status(pool) -> dict:
+    status = {'class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'in_use': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0),
+            'max_overflow': pool._max_overflow,
+        })
+    stats = getattr(pool, 'wait_stats', None)
+    if stats is not None:
+        status.update(stats.snapshot())
+    return status
+
+def warm_pool(engine, connections: int) -> int:
+    """
+    Abre 'connections' conexiones en paralelo y las devuelve al pool,
+    para que las primeras peticiones no paguen la latencia de conexión.
+    Nunca pide más de pool_size + max_overflow: el resto esperaría al
+    timeout del pool.
+    """
+    pool = engine.pool
+    if isinstance(pool, QueuePool) and pool._max_overflow >= 0:
+        connections = min(connections, pool.size() + pool._max_overflow)
+    if connections <= 0:
+        return 0
+
+    def open_one(_):
+        return engine.connect()
+
+    with ThreadPoolExecutor(max_workers=connections) as ex:
+        conns = list(ex.map(open_one, range(connections)))
+    for c in conns:
+        c.close()
+    return len(conns)
@@ -1,17 +1,25 @@
 import os
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+import time
 import uvicorn
 from datetime import datetime
+from typing import Optional
 from models.gas import GasSensor
 from models.motion import MotionSensor
 from models.particle import ParticleSensor
 from models.camera import CameraCapture
-from sqlalchemy import desc
 
-from db.connection import create_tables, SessionLocal
+from db.connection import create_tables, ensure_indexes, SessionLocal, engine, get_async_engine, DB_POOL_WARMUP
+from db.pool import pool_status, warm_pool
+from services.latest_cache import latest_cache, query_latest, row_to_dict, warm_latest
+from services.online_stats import online_stats
+from services.report_cache import report_cache
+from services.render_pool import RenderQueueFull, shutdown_pool
 from utils.time_utils import get_period_bounds_and_label
-from routes import camera, gas, motion, particle
+from utils.metrics import DB_POOL, REQUEST_LATENCY, instrument_sqlalchemy, render_metrics
+from routes import analysis, async_sensors, camera, gas, live, motion, particle
 
 app = FastAPI(title="Sensor API Simple")
 
@@ -21,64 +29,147 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Tiempos de cada sentencia SQL para /metrics
+instrument_sqlalchemy()
+
+FILTER_TYPES = {'today', 'last7', 'month', 'lastmonth'}
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Etiquetas con la plantilla de la ruta para no disparar la cardinalidad
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        ft = request.path_params.get("filter_type", "")
+        if ft and ft not in FILTER_TYPES:
+            ft = "other"
+        REQUEST_LATENCY.observe(time.perf_counter() - t0, request.method, path, ft, str(status))
+
 app.include_router(gas.router)
 app.include_router(motion.router)
 app.include_router(particle.router)
 app.include_router(camera.router)
+app.include_router(live.router)
+app.include_router(analysis.router)
+for async_router in async_sensors.routers:
+    app.include_router(async_router)
 
-# Endpoints para obtener el último dato de cada sensor
-@app.get("/latest/gas")
-def latest_gas():
+@app.exception_handler(RenderQueueFull)
+def render_queue_full(request: Request, exc: RenderQueueFull):
+    # El pool de renderizado está saturado: que el cliente reintente
+    return JSONResponse({"detail": str(exc)}, status_code=503, headers={"Retry-After": "5"})
+
+LATEST_SENSORS = {
+    'gas':      (GasSensor,      "No hay datos de gas"),
+    'motion':   (MotionSensor,   "No hay datos de movimiento"),
+    'particle': (ParticleSensor, "No hay datos de partículas"),
+    'camera':   (CameraCapture,  "No hay datos de cámara"),
+}
+
+def get_latest(sensor: str, system_id: Optional[str]):
+    # Primero la caché en memoria; sólo ante un fallo se consulta la BD
+    row = latest_cache.get(sensor, system_id)
+    if row is not None:
+        return row
+    model, not_found = LATEST_SENSORS[sensor]
     db = SessionLocal()
     try:
-        latest = db.query(GasSensor).order_by(desc(GasSensor.timestamp)).first()
+        latest = query_latest(db, model, system_id)
         if not latest:
-            raise HTTPException(404, "No hay datos de gas")
-        return latest
+            raise HTTPException(404, not_found)
+        row = row_to_dict(latest)
+        latest_cache.update(sensor, row)
+        return row
     finally:
         db.close()
 
+# Endpoints para obtener el último dato de cada sensor
+@app.get("/latest/gas")
+def latest_gas(system_id: Optional[str] = None):
+    return get_latest('gas', system_id)
+
 @app.get("/latest/motion")
-def latest_motion():
-    db = SessionLocal()
-    try:
-        latest = db.query(MotionSensor).order_by(desc(MotionSensor.timestamp)).first()
-        if not latest:
-            raise HTTPException(404, "No hay datos de movimiento")
-        return latest
-    finally:
-        db.close()
+def latest_motion(system_id: Optional[str] = None):
+    return get_latest('motion', system_id)
 
 @app.get("/latest/particle")
-def latest_particle():
-    db = SessionLocal()
-    try:
-        latest = db.query(ParticleSensor).order_by(desc(ParticleSensor.timestamp)).first()
-        if not latest:
-            raise HTTPException(404, "No hay datos de partículas")
-        return latest
-    finally:
-        db.close()
+def latest_particle(system_id: Optional[str] = None):
+    return get_latest('particle', system_id)
 
 @app.get("/latest/camera")
-def latest_camera():
-    db = SessionLocal()
-    try:
-        latest = db.query(CameraCapture).order_by(desc(CameraCapture.timestamp)).first()
-        if not latest:
-            raise HTTPException(404, "No hay datos de cámara")
-        return latest
-    finally:
-        db.close()
+def latest_camera(system_id: Optional[str] = None):
+    return get_latest('camera', system_id)
+
+@app.get("/cache/latest")
+def latest_cache_stats():
+    return latest_cache.stats()
+
+@app.get("/cache/online-stats")
+def online_stats_status():
+    return online_stats.stats()
+
+@app.get("/db/pool")
+def db_pool_stats():
+    # Estado del pool para dimensionarlo con datos reales
+    stats = {'sync': pool_status(engine.pool)}
+    async_engine = get_async_engine(create=False)
+    if async_engine is not None:
+        stats['async'] = pool_status(async_engine.sync_engine.pool)
+    return stats
+
+@app.get("/metrics")
+def metrics():
+    engines = {'sync': engine, 'async': get_async_engine(create=False)}
+    for name, eng in engines.items():
+        if eng is None:
+            continue
+        status = pool_status(getattr(eng, "sync_engine", eng).pool)
+        for state in ('in_use', 'checked_in', 'overflow'):
+            if state in status:
+                DB_POOL.set(name, state, value=status[state])
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache/reports")
+def report_cache_stats():
+    return report_cache.stats()
 
 @app.on_event("startup")
 def on_startup():
     # Crea las tablas si aún no existen
     create_tables()
     print("Tablas de base de datos listas")
+    # Añade a tablas existentes los índices declarados en los modelos
+    created = ensure_indexes()
+    if created:
+        print(f"Índices creados: {', '.join(created)}")
+    # Abre las conexiones del pool antes de recibir tráfico
+    opened = warm_pool(engine, DB_POOL_WARMUP)
+    print(f"Pool de conexiones precalentado: {opened} conexiones")
+    # Precarga la caché de /latest con el último dato por system_id
+    db = SessionLocal()
+    try:
+        for sensor, (model, _) in LATEST_SENSORS.items():
+            warm_latest(db, sensor, model)
+            # Estadísticas en memoria del día en curso
+            online_stats.rebuild(db, sensor)
+    finally:
+        db.close()
+    print(f"Caché de /latest lista: {latest_cache.stats()['systems']}")
+    print(f"Estadísticas del día listas: {online_stats.stats()}")
     print(f"CORS configurado para permitir todos los orígenes")
 
+@app.on_event("shutdown")
+def on_shutdown():
+    shutdown_pool()
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -18,4 +18,6 @@ class CameraCapture(Base):
 
     __table_args__ = (
         Index("idx_motion_id", "motion_id"),
+        Index("idx_camera_timestamp", "timestamp", "id"),
+        Index("idx_camera_system_timestamp", "system_id", "timestamp"),
     )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DECIMAL, DateTime
+from sqlalchemy import Column, String, DECIMAL, DateTime, Index
 from uuid import uuid4
 from db.connection import Base
 
@@ -11,3 +11,8 @@ class GasSensor(Base):
     co    = Column(DECIMAL(6,2), nullable=False)
     smoke = Column(DECIMAL(6,2), nullable=False)
     system_id = Column(String(50), nullable=False)
+
+    __table_args__ = (
+        Index("idx_gas_timestamp", "timestamp", "id"),
+        Index("idx_gas_system_timestamp", "system_id", "timestamp"),
+    )
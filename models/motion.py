@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DECIMAL, Boolean, DateTime
+from sqlalchemy import Column, String, DECIMAL, Boolean, DateTime, Index
 from uuid import uuid4
 from db.connection import Base
 
@@ -10,3 +10,8 @@ class MotionSensor(Base):
     motion_detected = Column(Boolean, nullable=False)
     intensity = Column(DECIMAL(6,2), nullable=False)
     system_id = Column(String(50), nullable=False)
+
+    __table_args__ = (
+        Index("idx_motion_timestamp", "timestamp", "id"),
+        Index("idx_motion_system_timestamp", "system_id", "timestamp"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DECIMAL, DateTime
+from sqlalchemy import Column, String, DECIMAL, DateTime, Index
 from uuid import uuid4
 from db.connection import Base
 
@@ -11,3 +11,8 @@ class ParticleSensor(Base):
     pm2_5 = Column(DECIMAL(8,2), nullable=False)
     pm10  = Column(DECIMAL(8,2), nullable=False)
     system_id = Column(String(50), nullable=False)
+
+    __table_args__ = (
+        Index("idx_particle_timestamp", "timestamp", "id"),
+        Index("idx_particle_system_timestamp", "system_id", "timestamp"),
+    )
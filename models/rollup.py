@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, Integer, Float, DateTime
+from db.connection import Base
+
+class SensorRollup(Base):
+    __tablename__ = "sensor_rollup"
+
+    sensor      = Column(String(20), primary_key=True)
+    field       = Column(String(20), primary_key=True)
+    granularity = Column(String(6), primary_key=True)   # minute | hour | day
+    bucket      = Column(DateTime, primary_key=True)
+    samples     = Column(Integer, nullable=False)
+    total       = Column(Float, nullable=False)
+    min_value   = Column(Float, nullable=False)
+    max_value   = Column(Float, nullable=False)
+    exceed      = Column(Integer, nullable=False, default=0)
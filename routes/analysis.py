@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from services.analysis_service import compare_periods
+from db.connection import get_db
+
+router = APIRouter(prefix="/analysis", tags=["analysis"])
+
+@router.get("/compare")
+def compare(
+    sensor: str,
+    field: str,
+    periods: str = "today,last7,month",
+    alpha: float = Query(0.05, gt=0, lt=1),
+    db: Session = Depends(get_db)
+):
+    # Pruebas inferenciales entre periodos calculadas en el servidor
+    try:
+        return compare_periods(db, sensor, field, periods.split(","), alpha)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
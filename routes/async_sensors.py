@@ -0,0 +1,95 @@
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services import camera_service, gas_service, motion_service, particle_service
+from services.batch_utils import MAX_BATCH_SIZE
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, resolve_after
+from services.report_engine import rollup_report
+from services.rollup_service import REPORT_GRANULARITY
+from services.online_stats import online_stats
+from services.sensor_config import SENSOR_FIELDS, SENSOR_THRESHOLDS
+from schemas.batch import BatchResult
+from schemas.camera import CameraDataCreate, CameraDataRead
+from schemas.gas import GasDataCreate, GasDataRead
+from schemas.motion import MotionDataCreate, MotionDataRead
+from schemas.particle import ParticleDataCreate, ParticleDataRead
+from db.connection import get_async_db
+from utils.time_utils import get_period_bounds_and_label
+
+# Variante async de las rutas de ingesta y consulta, bajo /async/{sensor}.
+# Las rutas síncronas siguen siendo las de routes/{sensor}.py.
+
+def build_async_router(sensor: str, service, create_schema, read_schema) -> APIRouter:
+    router = APIRouter(prefix=f"/async/{sensor}", tags=[f"{sensor} (async)"])
+    create_one   = getattr(service, f"create_{sensor}_async")
+    create_batch = getattr(service, f"create_{sensor}_batch_async")
+    get_page     = getattr(service, f"get_{sensor}_page_async")
+    get_stats    = getattr(service, f"get_{sensor}_stats_async")
+
+    @router.post("/", response_model=read_schema)
+    async def add_reading(data: create_schema, db: AsyncSession = Depends(get_async_db)):
+        return await create_one(db, data)
+
+    @router.post("/batch", response_model=BatchResult)
+    async def add_batch(items: list = Body(...), db: AsyncSession = Depends(get_async_db)):
+        if len(items) > MAX_BATCH_SIZE:
+            raise HTTPException(413, f"El lote supera el máximo de {MAX_BATCH_SIZE} lecturas")
+        return await create_batch(db, items)
+
+    @router.get("/all", response_model=list[read_schema])
+    async def all_readings(
+        response: Response,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        since: Optional[str] = None,
+        db: AsyncSession = Depends(get_async_db)
+    ):
+        try:
+            after = resolve_after(cursor, since)
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        rows, next_cursor = await get_page(db, after, limit)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return rows
+
+    @router.get("/statistics/{filter_type}")
+    async def statistics(
+        filter_type: str,
+        system_id: Optional[str] = None,
+        db: AsyncSession = Depends(get_async_db)
+    ):
+        start, end, label = get_period_bounds_and_label(filter_type)
+        fields = SENSOR_FIELDS[sensor]
+        online = online_stats.snapshot(sensor, fields, system_id) if filter_type == 'today' else None
+        if online is not None:
+            stats, risk = online
+        elif system_id is not None:
+            raise HTTPException(400, "system_id sólo está disponible para today")
+        else:
+            stats, risk = await get_stats(db, start, end, fields, SENSOR_THRESHOLDS[sensor])
+        return {'label': label, 'stats': stats, 'risk': risk}
+
+    @router.get("/report/{filter_type}")
+    async def report(
+        filter_type: str,
+        max_points: Optional[int] = Query(None, ge=3, le=10000),
+        db: AsyncSession = Depends(get_async_db)
+    ):
+        start, end, label = get_period_bounds_and_label(filter_type)
+        data = await db.run_sync(
+            rollup_report, sensor, start, end, REPORT_GRANULARITY[filter_type], max_points
+        )
+        if not data['stats']['count']:
+            raise HTTPException(404, f"No hay datos de {sensor} para este filtro")
+        return {'label': label, **data}
+
+    return router
+
+routers = [
+    build_async_router("gas",      gas_service,      GasDataCreate,      GasDataRead),
+    build_async_router("motion",   motion_service,   MotionDataCreate,   MotionDataRead),
+    build_async_router("particle", particle_service, ParticleDataCreate, ParticleDataRead),
+    build_async_router("camera",   camera_service,   CameraDataCreate,   CameraDataRead),
+]
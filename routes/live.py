@@ -0,0 +1,66 @@
+import asyncio
+from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
+from typing import Optional
+from fastapi.responses import StreamingResponse
+
+from services.live_feed import live_feed, parse_filter
+
+router = APIRouter(tags=["live"])
+
+# Segundos sin lecturas tras los que se envía un latido SSE
+HEARTBEAT_S = 15
+
+@router.websocket("/ws/live")
+async def live_ws(websocket: WebSocket, sensor: Optional[str] = None, system_id: Optional[str] = None):
+    await websocket.accept()
+    sub = live_feed.subscribe(parse_filter(sensor), parse_filter(system_id))
+    # receive() compite con la cola, como is_disconnected() en SSE: un cliente
+    # cuyo filtro no recibe nada también se da de baja al cerrar
+    receive = asyncio.ensure_future(websocket.receive())
+    get = None
+    try:
+        while True:
+            if get is None:
+                get = asyncio.ensure_future(sub.queue.get())
+            done, _ = await asyncio.wait({receive, get}, return_when=asyncio.FIRST_COMPLETED)
+            if get in done:
+                await websocket.send_text(get.result())
+                get = None
+            if receive in done:
+                if receive.result()["type"] == "websocket.disconnect":
+                    break
+                # Los mensajes del cliente se ignoran
+                receive = asyncio.ensure_future(websocket.receive())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in (receive, get):
+            if task is not None:
+                task.cancel()
+        live_feed.unsubscribe(sub)
+
+@router.get("/live/stream")
+async def live_sse(request: Request, sensor: Optional[str] = None, system_id: Optional[str] = None):
+    sub = live_feed.subscribe(parse_filter(sensor), parse_filter(system_id))
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(sub.queue.get(), HEARTBEAT_S)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield f"data: {message}\n\n"
+        finally:
+            live_feed.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/live/stats")
+def live_stats():
+    return live_feed.stats()
@@ -1,17 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
-from datetime import datetime
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response
+from datetime import datetime, timedelta
+from typing import Optional
 from sqlalchemy.orm import Session
 from fastapi.responses import StreamingResponse
 
-from services.stats_utils import compute_stats
-from services.particle_service import create_particle, get_particle
-from services.pdf_report import (
-    build_pdf_report,
-    generate_donut_plot,
-    generate_line_plot,
-    sample_points
+from services.particle_service import (
+    create_particle,
+    create_particle_batch,
+    get_particle,
+    get_particle_page,
+    get_particle_stats,
+    get_particle_watermark,
+    stream_particle,
+    export_particle
 )
+from services.batch_utils import MAX_BATCH_SIZE
+from services.export_service import EXPORT_MEDIA_TYPES, export_available
+from services.rollup_service import REPORT_GRANULARITY, parse_series_params, query_series
+from services.report_engine import LINE_POINTS, load_report_frame, rollup_report
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, parse_since, resolve_after
+from services.online_stats import online_stats
+from services.report_cache import report_cache
+from services.sensor_config import SENSOR_THRESHOLDS
+from services.render_pool import render_pdf
 from schemas.particle import ParticleDataCreate, ParticleDataRead
+from schemas.batch import BatchResult
 from db.connection import get_db
 from utils.time_utils import get_period_bounds_and_label
 
@@ -21,77 +34,127 @@ router = APIRouter(prefix="/particle", tags=["particle"])
 def add_particle(data: ParticleDataCreate, db: Session = Depends(get_db)):
     return create_particle(db, data)
 
+@router.post("/batch", response_model=BatchResult)
+def add_particle_batch(items: list = Body(...), db: Session = Depends(get_db)):
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(413, f"El lote supera el máximo de {MAX_BATCH_SIZE} lecturas")
+    return create_particle_batch(db, items)
+
 @router.get("/all", response_model=list[ParticleDataRead])
-def all_particles(db: Session = Depends(get_db)):
-    return get_particle(db, datetime.min, datetime.max)
+def all_particles(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: Session = Depends(get_db)
+):
+    try:
+        after = resolve_after(cursor, since)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if format == "ndjson":
+        return StreamingResponse(stream_particle(after), media_type="application/x-ndjson")
+    if limit is None and after is None:
+        return get_particle(db, datetime.min, datetime.max)
+    rows, next_cursor = get_particle_page(db, after, limit or DEFAULT_PAGE_SIZE)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
+
+@router.get("/export")
+def particle_export(
+    start: datetime = datetime.min,
+    end: datetime = datetime.max,
+    format: str = Query("arrow", pattern="^(arrow|parquet|csv)$"),
+    since: Optional[str] = None
+):
+    # Exportación columnar en streaming directamente desde el cursor de la BD
+    if not export_available(format):
+        raise HTTPException(501, f"Exportar a {format} requiere pyarrow")
+    try:
+        after = parse_since(since)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return StreamingResponse(
+        export_particle(start, end, format, after),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=particle_export.{format}"}
+    )
+
+@router.get("/series")
+def particle_series(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: str = "1h",
+    agg: str = "mean,max,count",
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    # Serie por bucket agregada en el servidor desde los rollups
+    end = end or datetime.now()
+    start = start or end - timedelta(days=1)
+    try:
+        granularity, aggs = parse_series_params(bucket, agg, start, end)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    field_list = fields.split(",") if fields else None
+    data = query_series(db, "particle", start, end, granularity, aggs, field_list)
+    return {'bucket': bucket, 'start': start, 'end': end, **data}
 
 @router.get("/statistics/{filter_type}")
-def particle_stats(filter_type: str, db: Session = Depends(get_db)):
+def particle_stats(filter_type: str, system_id: Optional[str] = None, db: Session = Depends(get_db)):
     start, end, label = get_period_bounds_and_label(filter_type)
-    records = get_particle(db, start, end)
-    stats = compute_stats(records, ['pm1_0','pm2_5','pm10'])
-    return {'label': label, 'stats': stats}
+    fields = ['pm1_0','pm2_5','pm10']
+    # El día en curso se sirve de las estadísticas en memoria, sin ir a la BD
+    online = online_stats.snapshot("particle", fields, system_id) if filter_type == 'today' else None
+    if online is not None:
+        stats, risk = online
+    elif system_id is not None:
+        raise HTTPException(400, "system_id sólo está disponible para today")
+    else:
+        stats, risk = get_particle_stats(db, start, end, fields, SENSOR_THRESHOLDS["particle"])
+    return {'label': label, 'stats': stats, 'risk': risk}
 
 @router.get("/report/{filter_type}")
-def particle_full_report(filter_type: str, db: Session = Depends(get_db)):
+def particle_full_report(
+    filter_type: str,
+    max_points: Optional[int] = Query(None, ge=3, le=10000),
+    db: Session = Depends(get_db)
+):
     start, end, label = get_period_bounds_and_label(filter_type)
-    records = get_particle(db, start, end)
-    if not records:
-        raise HTTPException(404, "No hay datos de particle para este filtro")
-    from services.report_utils import build_sensor_report
-    report = build_sensor_report(
-        records,
-        ['pm1_0','pm2_5','pm10'],
-        thresholds={'pm2_5':35.0}
+    report = rollup_report(
+        db, "particle", start, end, REPORT_GRANULARITY[filter_type], max_points
     )
+    if not report['stats']['count']:
+        raise HTTPException(404, "No hay datos de particle para este filtro")
     return {'label': label, **report}
 
 @router.get("/pdf/{filter_type}")
 def particle_pdf_report(filter_type: str, db: Session = Depends(get_db)):
     # 1) Periodo
     start, end, label = get_period_bounds_and_label(filter_type)
-    # 2) Datos
-    records = get_particle(db, start, end)
-    if not records:
+    # 2) Marca de agua de los datos: si no han cambiado se sirve el PDF cacheado
+    watermark = get_particle_watermark(db, start, end)
+    if not watermark[1]:
         raise HTTPException(404, "No hay datos para este periodo")
 
-    # 3) Stats + riesgo
-    fields     = ['pm1_0','pm2_5','pm10']
-    thresholds = {'pm2_5':35.0}
-    stats = compute_stats(records, fields)
-    cnt   = stats.get('count', 0)
-    risk  = {
-        f: (sum(float(getattr(r, f))>U for r in records)/cnt if cnt else 0)
-        for f,U in thresholds.items()
-    }
-
-    # 4) Ordenar y muestrear
-    sorted_recs = sorted(records, key=lambda r: r.timestamp)
-    pts = [
-        {'timestamp': r.timestamp,
-         'pm1_0': float(r.pm1_0),
-         'pm2_5': float(r.pm2_5),
-         'pm10':  float(r.pm10)}
-        for r in sorted_recs
-    ]
-    SAMPLE_COUNTS = {'today':8, 'last7':7, 'month':6}
-    desired = SAMPLE_COUNTS.get(filter_type, len(pts))
-    sampled = sample_points(pts, desired)
+    def render() -> bytes:
+        # 3) Rollups del periodo en arrays: estadísticas, riesgo y series vectorizadas
+        frame = load_report_frame(db, "particle", start, end, REPORT_GRANULARITY[filter_type])
+        stats, risk = frame.stats_and_risk()
+        if not stats['count']:
+            raise HTTPException(404, "No hay datos para este periodo")
 
-    # 5) Generar gráficas
-    graphs = {}
-    times = [p['timestamp'] for p in sampled]
-    for f in fields:
-        vals = [p[f] for p in sampled]
-        safe = sum(v<=thresholds.get(f,float('inf')) for v in vals)
-        crit = sum(v> thresholds.get(f,float('inf')) for v in vals)
-        graphs[f"donut_{f}"] = generate_donut_plot(safe, crit, f.upper())
-        graphs[f"line_{f}"]  = generate_line_plot(times, vals, f.upper())
+        # 4) Gráficas (donut exacto + línea LTTB) y PDF
+        charts = frame.pdf_charts(stats, risk, LINE_POINTS.get(filter_type))
+        return render_pdf("Particle", label, stats, risk, charts, watermark[0])
 
-    # 6) PDF
-    pdf_bytes = build_pdf_report("Particle", label, stats, risk, graphs)
-    return StreamingResponse(
-        pdf_bytes,
+    pdf_bytes = report_cache.get_or_build(
+        ("particle", filter_type, start.date(), *watermark), render
+    )
+    return Response(
+        content=pdf_bytes,
         media_type="application/pdf",
         headers={"Content-Disposition": f"attachment; filename=particle_report_{filter_type}.pdf"}
     )
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from typing import List
+
+class BatchItemError(BaseModel):
+    index: int
+    errors: List[str]
+
+class BatchResult(BaseModel):
+    inserted: int
+    ids: List[str]
+    errors: List[BatchItemError]
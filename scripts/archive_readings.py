@@ -0,0 +1,23 @@
+import sys
+
+from db.connection import SessionLocal, create_tables
+from services.archive_service import ARCHIVE_AFTER_DAYS, ARCHIVE_DIR, archive_all
+
+# Uso: python -m scripts.archive_readings [días]
+# Mueve a Parquet (ARCHIVE_DIR) las lecturas más antiguas que N días
+# (ARCHIVE_AFTER_DAYS por defecto) y las borra de la BD por lotes.
+# Pensado para ejecutarse periódicamente (cron).
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else ARCHIVE_AFTER_DAYS
+    create_tables()
+    db = SessionLocal()
+    try:
+        moved = archive_all(db, days)
+    finally:
+        db.close()
+    for sensor, n in moved.items():
+        print(f"→ {sensor}: {n} lecturas archivadas en {ARCHIVE_DIR}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import sys
+from datetime import datetime
+
+from db.connection import SessionLocal, create_tables
+from services.rollup_service import backfill_rollups
+from services.sensor_config import SENSOR_MODELS
+
+# Uso: python -m scripts.backfill_rollups [sensor] [YYYY-MM-DD inicio] [YYYY-MM-DD fin]
+# Sin argumentos recalcula los rollups de todos los sensores y todo el histórico.
+
+def main():
+    sensors = [sys.argv[1]] if len(sys.argv) > 1 else list(SENSOR_MODELS)
+    start = datetime.fromisoformat(sys.argv[2]) if len(sys.argv) > 2 else None
+    end   = datetime.fromisoformat(sys.argv[3]) if len(sys.argv) > 3 else None
+    create_tables()
+    db = SessionLocal()
+    try:
+        for sensor in sensors:
+            days = backfill_rollups(db, sensor, start, end)
+            print(f"→ Rollups de {sensor}: {days} días recalculados")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from scripts.benchmark_db_modes import run_scenario
+from simulators.camera_simulator import simulate_camera_once
+from simulators.gas_simulator import simulate_gas_once
+from simulators.motion_simulator import simulate_motion_once
+from simulators.particle_simulator import simulate_particle_once
+
+# Benchmark reproducible de la API completa. Arranca la app contra una
+# SQLite temporal (o la BD de --database-url), la siembra con los
+# simuladores y mide ingesta, /latest, /statistics, /report y /pdf.
+#   python -m scripts.benchmark --seed 20000 --output bench.json
+#   python -m scripts.benchmark --output new.json --baseline bench.json
+
+SEED_BATCH = 1000
+SIMULATORS = {
+    'gas':      simulate_gas_once,
+    'motion':   simulate_motion_once,
+    'particle': simulate_particle_once,
+}
+
+def reading(sensor, motion_ids, ts=None):
+    if sensor == 'camera':
+        data = simulate_camera_once(random.choice(motion_ids))
+    else:
+        data = SIMULATORS[sensor]()
+    if ts is not None:
+        data.timestamp = ts
+    return data.model_dump(mode="json")
+
+def scenarios(motion_ids):
+    """(nombre, método, ruta, generador del cuerpo) de cada escenario medido."""
+    out = []
+    for s in ('gas', 'motion', 'particle', 'camera'):
+        out.append((f"ingest_{s}", 'POST', f"/{s}/", lambda s=s: reading(s, motion_ids)))
+    for s in ('gas', 'motion', 'particle', 'camera'):
+        out.append((f"latest_{s}", 'GET', f"/latest/{s}", None))
+    for period in ('today', 'last7', 'month'):
+        out.append((f"statistics_gas_{period}", 'GET', f"/gas/statistics/{period}", None))
+        out.append((f"report_gas_{period}", 'GET', f"/gas/report/{period}", None))
+    out.append(("pdf_gas_month", 'GET', "/gas/pdf/month", None))
+    out.append(("pdf_particle_last7", 'GET', "/particle/pdf/last7", None))
+    return out
+
+async def seed(client, per_sensor, days):
+    """Siembra `per_sensor` lecturas por sensor repartidas en los últimos `days` días."""
+    now = datetime.now()
+    motion_ids = []
+
+    def ts():
+        return now - timedelta(seconds=random.uniform(0, days * 86400))
+
+    for sensor in ('motion', 'gas', 'particle', 'camera'):
+        for i in range(0, per_sensor, SEED_BATCH):
+            n = min(SEED_BATCH, per_sensor - i)
+            batch = [reading(sensor, motion_ids, ts()) for _ in range(n)]
+            r = await client.post(f"/{sensor}/batch", json=batch)
+            r.raise_for_status()
+            if sensor == 'motion':
+                motion_ids.extend(r.json()['ids'])
+    return motion_ids
+
+def start_app(port, database_url, workdir):
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': database_url,
+        'REPORT_CACHE_DIR': os.path.join(workdir, 'report_cache'),
+        'ARCHIVE_DIR': os.path.join(workdir, 'archive'),
+    })
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("La API no ha arrancado")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/db/pool", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("La API no responde tras 60 s")
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def run_all(args, api):
+    limits = httpx.Limits(max_connections=args.concurrency)
+    results = []
+    async with httpx.AsyncClient(base_url=api, limits=limits, timeout=120) as client:
+        t0 = time.perf_counter()
+        motion_ids = await seed(client, args.seed, args.days)
+        print(f"Sembradas {args.seed} lecturas por sensor en {time.perf_counter() - t0:.1f}s")
+        for name, method, path, make_body in scenarios(motion_ids):
+            cold_ms = None
+            if method == 'GET':
+                # Primera petición aparte: incluye la construcción de cachés
+                t1 = time.perf_counter()
+                await client.get(path)
+                cold_ms = (time.perf_counter() - t1) * 1000
+            res = await run_scenario(client, method, path, args.requests, args.concurrency, make_body)
+            results.append({'scenario': name, 'cold_ms': cold_ms, **res})
+            print(f"{name:<24} {res['throughput_rps']:8.1f} req/s  p50={res['p50_ms']:.1f}ms "
+                  f"p95={res['p95_ms']:.1f}ms p99={res['p99_ms']:.1f}ms errores={res['errors']}")
+    return results
+
+def compare(results, baseline, threshold):
+    """
+    Compara con una ejecución anterior. Marca regresión si el p95 sube o
+    el throughput baja más de `threshold` (fracción). Devuelve las regresiones.
+    """
+    base = {r['scenario']: r for r in baseline['results']}
+    regressions = []
+    print(f"\nComparación con {baseline['meta'].get('commit')} (umbral {threshold:.0%})")
+    for r in results:
+        old = base.get(r['scenario'])
+        if not old:
+            continue
+        d_rps = r['throughput_rps'] / old['throughput_rps'] - 1
+        d_p95 = r['p95_ms'] / old['p95_ms'] - 1 if old['p95_ms'] else 0.0
+        bad = d_p95 > threshold or d_rps < -threshold
+        if bad:
+            regressions.append(r['scenario'])
+        print(f"{r['scenario']:<24} req/s {d_rps:+7.1%}  p95 {d_p95:+7.1%}{'  ← REGRESIÓN' if bad else ''}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de carga y latencia de la API")
+    parser.add_argument("--api", help="usar una API ya arrancada en vez de lanzar una")
+    parser.add_argument("--database-url", help="BD para la API lanzada (por defecto SQLite temporal)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=5000, help="lecturas sembradas por sensor")
+    parser.add_argument("--days", type=int, default=30, help="días que abarcan las lecturas sembradas")
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=500, help="peticiones por escenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--output", help="fichero JSON con los resultados")
+    parser.add_argument("--baseline", help="JSON de una ejecución anterior para comparar")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    random.seed(args.random_seed)
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    proc = None if args.api else start_app(args.port, database_url, workdir)
+    api = args.api or f"http://127.0.0.1:{args.port}"
+    try:
+        results = asyncio.run(run_all(args, api))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'database': 'external' if args.api else database_url.split(':', 1)[0],
+            'seed': args.seed, 'days': args.days, 'random_seed': args.random_seed,
+            'requests': args.requests, 'concurrency': args.concurrency,
+            'python': platform.python_version(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
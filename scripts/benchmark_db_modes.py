@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+from simulators.gas_simulator import simulate_gas_once
+
+# Compara las rutas síncronas (/gas/...) con las async (/async/gas/...)
+# contra una API ya arrancada. Ejemplo:
+#   python -m scripts.benchmark_db_modes --requests 2000 --concurrency 64
+
+SCENARIOS = {
+    'ingest':     ('POST', '/gas/'),
+    'statistics': ('GET',  '/gas/statistics/today'),
+    'page':       ('GET',  '/gas/all?limit=100'),
+}
+
+def gas_body():
+    return simulate_gas_once().model_dump(mode="json")
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))
+    return values[k]
+
+async def run_scenario(client, method, path, total, concurrency, make_body=None):
+    latencies, errors = [], 0
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            queue.get_nowait()
+            body = make_body() if make_body else None
+            t0 = time.perf_counter()
+            try:
+                r = await client.request(method, path, json=body)
+                if r.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    return {
+        'requests': total,
+        'errors': errors,
+        'throughput_rps': total / elapsed,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'mean_ms': statistics.fmean(latencies) if latencies else None,
+    }
+
+async def main_async(args):
+    limits = httpx.Limits(max_connections=args.concurrency)
+    results = []
+    async with httpx.AsyncClient(base_url=args.api, limits=limits, timeout=60) as client:
+        for name, (method, path) in SCENARIOS.items():
+            for mode, prefix in (('sync', ''), ('async', '/async')):
+                make_body = gas_body if method == 'POST' else None
+                res = await run_scenario(client, method, prefix + path, args.requests,
+                                         args.concurrency, make_body)
+                results.append({'scenario': name, 'mode': mode, **res})
+                print(f"{name:<11} {mode:<5} {res['throughput_rps']:8.1f} req/s  "
+                      f"p50={res['p50_ms']:.1f}ms p95={res['p95_ms']:.1f}ms "
+                      f"p99={res['p99_ms']:.1f}ms errores={res['errors']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sync vs async de la capa de BD")
+    parser.add_argument("--api", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--output", help="fichero JSON con los resultados")
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from sqlalchemy import event
+
+from db.connection import engine, SessionLocal, create_tables, ensure_indexes
+from services.columnar import read_columns
+from services.latest_cache import query_latest
+from services.pagination import get_page
+from services.rollup_service import SERIES_AGGS, query_series
+from services.sensor_config import SENSOR_FIELDS, SENSOR_MODELS, SENSOR_THRESHOLDS
+from services.stats_utils import query_stats
+
+# Ejecuta EXPLAIN sobre las consultas calientes contra la BD configurada
+# (DATABASE_URL, p.ej. una MySQL local con datos sembrados) y termina con
+# código 1 si alguna recorre la tabla o, si necesita un rango, el índice entero.
+# Las consultas salen de las funciones de producción, no de SQL copiado.
+
+# Tipos de acceso de MySQL que son una búsqueda en el índice
+MYSQL_SEEKS = {"range", "ref", "eq_ref", "const", "system"}
+
+def hot_queries(sensor: str, start: datetime, end: datetime) -> dict:
+    """
+    {nombre: (exige_rango, función(db))}. 'latest' puede recorrer el
+    índice en orden porque lee una sola fila (LIMIT 1).
+    """
+    model = SENSOR_MODELS[sensor]
+    fields = SENSOR_FIELDS[sensor]
+    return {
+        'latest': (False, lambda db: query_latest(db, model)),
+        'latest_system': (True, lambda db: query_latest(db, model, "1")),
+        'range': (True, lambda db: read_columns(db, sensor, ['timestamp', fields[0]], start, end)),
+        'stats': (True, lambda db: query_stats(db, model, fields, start, end,
+                                               SENSOR_THRESHOLDS[sensor])),
+        'page': (True, lambda db: get_page(db, model, (start, ""), 500)),
+        'series': (True, lambda db: query_series(db, sensor, start, end, 'hour',
+                                                 list(SERIES_AGGS), fields)),
+    }
+
+@contextmanager
+def captured_selects(bind):
+    """Recoge (sql, parámetros) de cada SELECT que se ejecute en `bind`."""
+    statements: List[Tuple[str, object]] = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(bind, "before_cursor_execute", before)
+    try:
+        yield statements
+    finally:
+        event.remove(bind, "before_cursor_execute", before)
+
+def explain(conn, statement: str, parameters, seek: bool) -> Tuple[List[str], bool]:
+    """(plan legible, correcto) de una sentencia ya compilada."""
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).mappings().all()
+        plan = [r['detail'] for r in rows]
+        scans = [d for d in plan if d.startswith("SCAN")]
+        # "SCAN t" es la tabla entera; "SCAN t USING INDEX" es el índice entero
+        ok = not (scans if seek else [d for d in scans if "INDEX" not in d])
+    else:
+        rows = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).mappings().all()
+        plan = [f"{r['table']}: type={r['type']} key={r['key']}" for r in rows]
+        types = [(r['type'] or '').lower() for r in rows]
+        ok = all(t in MYSQL_SEEKS for t in types) if seek else "all" not in types
+    return plan, ok
+
+def check_plans(bind, db, sensor: str, start: datetime, end: datetime) -> List[Tuple[str, List[str], bool]]:
+    """Ejecuta cada consulta caliente del sensor y explica los SELECT que emite."""
+    results = []
+    for name, (seek, run) in hot_queries(sensor, start, end).items():
+        with captured_selects(bind) as statements:
+            run(db)
+        with bind.connect() as conn:
+            for statement, parameters in statements:
+                plan, ok = explain(conn, statement, parameters, seek)
+                results.append((name, plan, ok))
+    return results
+
+def main():
+    create_tables()
+    ensure_indexes()
+    end = datetime.now()
+    start = end - timedelta(days=7)
+    db = SessionLocal()
+    failures = 0
+    try:
+        for sensor in SENSOR_MODELS:
+            for name, plan, ok in check_plans(engine, db, sensor, start, end):
+                status = "ok" if ok else "SIN RANGO"
+                print(f"[{status}] {sensor}.{name}: {' | '.join(plan)}")
+                failures += not ok
+    finally:
+        db.close()
+    if failures:
+        print(f"{failures} consultas recorren la tabla o el índice completo")
+        sys.exit(1)
+    print("Todas las consultas usan búsquedas por índice")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
-import sys
+import argparse
+import os
 import requests
 import pandas as pd
 import numpy as np
@@ -6,9 +7,12 @@ from datetime import datetime
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 
+from scripts.plot_batch import add_batch_args, finish, render_all
+from scripts.sensor_cache import load_sensor
 from utils.time_utils import get_period_bounds_and_label
 
-API = "http://127.0.0.1:8000"
+# SENSOR_API permite apuntar a la API de cada instalación
+API = os.getenv("SENSOR_API", "http://127.0.0.1:8000")
 
 # Mapa de nombres en español para campos y títulos
 FIELD_LABELS = {
@@ -25,17 +29,26 @@ FIELD_LABELS = {
 # ----- Funciones auxiliares -----
 
 def fetch_all(sensor: str) -> pd.DataFrame:
-    r = requests.get(f"{API}/{sensor}/all")
+    # Caché local en Parquet: sólo se descargan las lecturas nuevas
+    return load_sensor(API, sensor)
+
+
+def fetch_series(sensor: str, field: str, start, end, bucket: str) -> pd.Series:
+    # Medias por bucket calculadas en el servidor (/series), sin bajar las lecturas
+    r = requests.get(f"{API}/{sensor}/series", params={
+        'start': start.isoformat(), 'end': end.isoformat(),
+        'bucket': bucket, 'agg': 'mean', 'fields': field
+    })
     r.raise_for_status()
     data = r.json()
-    return pd.DataFrame(data) if data else pd.DataFrame()
+    return pd.Series(data['series'][field]['mean'], index=pd.to_datetime(data['t']))
 
 
 def filter_by_period(df: pd.DataFrame, start, end) -> pd.DataFrame:
     if df.empty:
         return df
     df['ts'] = pd.to_datetime(df['timestamp'])
-    return df.loc[df['ts'].dt.date.between(start, end)]
+    return df.loc[df['ts'].between(start, end)]
 
 
 def basic_stats(vals: list[float]) -> dict:
@@ -53,7 +66,7 @@ def risk_prob(vals: list[float], U: float) -> float:
     return sum(v > U for v in vals) / len(vals) if vals else 0
 
 
-def plot_hist_donut(vals, U, unit, label_fld, periodo_label):
+def plot_hist_donut(vals, U, unit, label_fld, periodo_label, name="hist"):
     safe = [v for v in vals if v <= U]
     crit = [v for v in vals if v > U]
 
@@ -79,20 +92,21 @@ def plot_hist_donut(vals, U, unit, label_fld, periodo_label):
     axes[1].set_title(f"Proporción de {label_fld}")
 
     plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-    plt.show()
+    finish(name, fig)
 
 
-def plot_timebar(df, field, start, end, periodo_label, unit):
-    single_day = (start == end)
-    df2 = df.copy()
+def plot_timebar(sensor, field, start, end, periodo_label, unit, name="timebar"):
+    single_day = (start.date() == end.date())
     if single_day:
-        df2['sub'] = df2['ts'].dt.hour
+        grp = fetch_series(sensor, field, start, end, '1h')
+        grp.index = grp.index.hour
         xlabel = "Hora del día"
     else:
-        df2['sub'] = df2['ts'].dt.date
+        grp = fetch_series(sensor, field, start, end, '1d')
         xlabel = "Fecha"
+    if grp.empty:
+        return
 
-    grp = df2.groupby('sub')[field].mean()
     fig, ax = plt.subplots(figsize=(10, 4))
     ax.bar(grp.index, grp.values, edgecolor='k', alpha=0.8)
     ax.set_title(f"Evolución de {FIELD_LABELS[field]} ({periodo_label})", fontsize=14)
@@ -109,10 +123,10 @@ def plot_timebar(df, field, start, end, periodo_label, unit):
         ax.text(x, v + max(grp.values)*0.02,
                 f"{v:.1f} {unit}", ha='center', va='bottom', fontsize=10)
     plt.tight_layout()
-    plt.show()
+    finish(name, fig)
 
 
-def plot_anova_points(data_dict, field, periodo_labels):
+def plot_anova_points(data_dict, field, periodo_labels, name="anova"):
     fig, ax = plt.subplots(figsize=(8, 5))
     for i, periodo in enumerate(periodo_labels, start=1):
         vals = data_dict[periodo]
@@ -123,24 +137,61 @@ def plot_anova_points(data_dict, field, periodo_labels):
     ax.set_ylabel(f"{FIELD_LABELS[field]}")
     ax.grid(True, linestyle='--', alpha=0.5)
     plt.tight_layout()
-    plt.show()
+    finish(name, fig)
+
+
+# ----- Modo por lotes -----
+
+SENSORES = {
+    'gas': [('lpg', 800.0, 'ppm'), ('co', 50.0, 'ppm'), ('smoke', 300.0, 'ppm')],
+    'particle': [('pm1_0', None, 'µg/m³'), ('pm2_5', 35.0, 'µg/m³'), ('pm10', None, 'µg/m³')],
+    'motion': [('intensity', None, '')],
+    'camera': [('latency_ms', 200, 'ms')]
+}
+
+def batch_jobs(periodos: list[str]) -> list:
+    """Todas las figuras de todos los sensores, campos y periodos."""
+    bounds = {p: get_period_bounds_and_label(p) for p in periodos}
+    jobs = []
+    for sensor, campos in SENSORES.items():
+        # Una lectura por sensor (caché local) y un filtro por periodo
+        df_all = fetch_all(sensor)
+        for p, (start, end, label) in bounds.items():
+            df = filter_by_period(df_all, start, end)
+            if df.empty: continue
+            for field, U, unit in campos:
+                if field not in df: continue
+                if U is not None:
+                    jobs.append((f"{p}/{sensor}_{field}_hist", plot_hist_donut,
+                                 (df[field].tolist(), U, unit, FIELD_LABELS[field], label)))
+                jobs.append((f"{p}/{sensor}_{field}_timebar", plot_timebar,
+                             (sensor, field, start, end, label, unit)))
+
+        if sensor == 'camera' and len(bounds) > 1:
+            grupos = {lbl: filter_by_period(df_all, s, e)['latency_ms'].dropna().tolist()
+                      for s, e, lbl in bounds.values()}
+            jobs.append(("camera_latency_ms_anova", plot_anova_points,
+                         (grupos, 'latency_ms', list(grupos))))
+    return jobs
 
 
 # ----- Ejecutable principal -----
 
 def main():
-    periodo = sys.argv[1] if len(sys.argv)>1 else 'today'
+    parser = argparse.ArgumentParser(description="Gráficas de los sensores")
+    parser.add_argument("periodo", nargs="?", default="today")
+    add_batch_args(parser)
+    args = parser.parse_args()
+    if args.batch:
+        jobs = batch_jobs(args.periods.split(","))
+        failed = render_all(jobs, args.batch, args.formats.split(","), args.workers)
+        raise SystemExit(1 if failed else 0)
+
+    periodo = args.periodo
     start, end, periodo_label = get_period_bounds_and_label(periodo)
     print(f"=== Reporte período: {periodo_label} ===")
 
-    sensores = {
-        'gas': [('lpg', 800.0, 'ppm'), ('co', 50.0, 'ppm'), ('smoke', 300.0, 'ppm')],
-        'particle': [('pm1_0', None, 'µg/m³'), ('pm2_5', 35.0, 'µg/m³'), ('pm10', None, 'µg/m³')],
-        'motion': [('intensity', None, '')],
-        'camera': [('latency_ms', 200, 'ms')]
-    }
-
-    for sensor, campos in sensores.items():
+    for sensor, campos in SENSORES.items():
         df_all = fetch_all(sensor)
         df = filter_by_period(df_all, start, end)
         if df.empty: continue
@@ -155,7 +206,7 @@ def main():
 
             if U is not None:
                 plot_hist_donut(vals, U, unit, FIELD_LABELS[field], periodo_label)
-            plot_timebar(df, field, start, end, periodo_label, unit)
+            plot_timebar(sensor, field, start, end, periodo_label, unit)
 
     # ANOVA para latencia de cámara
     periodos = ['today', 'last7', 'month']
@@ -0,0 +1,17 @@
+from db.connection import create_tables, ensure_indexes
+
+# Crea los índices de timestamp/system_id en tablas MySQL ya existentes.
+# Conviene ejecutarlo antes del despliegue en tablas grandes para que
+# el arranque de la API no tenga que construirlos.
+
+def main():
+    create_tables()
+    created = ensure_indexes()
+    if created:
+        for name in created:
+            print(f"→ Índice creado: {name}")
+    else:
+        print("Todos los índices ya existen")
+
+if __name__ == "__main__":
+    main()
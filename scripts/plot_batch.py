@@ -0,0 +1,85 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import matplotlib.pyplot as plt
+
+# Modo por lotes de los scripts de gráficas: en vez de plt.show() cada
+# figura se guarda en OUTPUT_DIR y se cierra. Sin directorio, se muestra.
+BATCH_PERIODS = ('today', 'last7', 'month', 'lastmonth')
+BATCH_DPI     = 110
+
+_output = {'dir': None, 'formats': ('png',)}
+
+# (nombre de la figura, función de dibujo, argumentos)
+Job = Tuple[str, Callable, tuple]
+
+def configure(output_dir: Optional[str], formats: Sequence[str] = ('png',)):
+    _output['dir'] = output_dir
+    _output['formats'] = tuple(formats)
+    if output_dir:
+        # Sin pantalla: backend de sólo raster/vector
+        plt.switch_backend('Agg')
+
+def finish(name: str, fig=None) -> List[str]:
+    """Muestra la figura o, en modo lotes, la guarda como <dir>/<name>.<fmt>."""
+    if _output['dir'] is None:
+        plt.show()
+        return []
+    fig = fig or plt.gcf()
+    base = os.path.join(_output['dir'], name)
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    paths = []
+    for fmt in _output['formats']:
+        path = f"{base}.{fmt}"
+        fig.savefig(path, format=fmt, dpi=BATCH_DPI)
+        paths.append(path)
+    plt.close(fig)
+    return paths
+
+def add_batch_args(parser):
+    parser.add_argument("--batch", metavar="DIR",
+                        help="renderizar todas las figuras sin pantalla en DIR")
+    parser.add_argument("--formats", default="png", help="formatos separados por comas (png,svg)")
+    parser.add_argument("--periods", default=",".join(BATCH_PERIODS))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+
+def _run(name: str, fn: Callable, args: tuple) -> int:
+    fn(*args, name=name)
+    return len(_output['formats'])
+
+def render_all(jobs: List[Job], output_dir: str, formats: Sequence[str], workers: int) -> int:
+    """
+    Reparte las figuras en un pool de procesos (spawn, como el de los
+    PDFs). Un fallo en una figura se informa y no detiene el resto.
+    Devuelve el número de figuras fallidas.
+    """
+    configure(output_dir, formats)
+    t0 = time.perf_counter()
+    files = failed = 0
+    if workers <= 1:
+        for name, fn, args in jobs:
+            try:
+                files += _run(name, fn, args)
+            except Exception as e:
+                failed += 1
+                print(f"[error] {name}: {e}")
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=configure,
+            initargs=(output_dir, tuple(formats)),
+        ) as pool:
+            futures = {pool.submit(_run, name, fn, args): name for name, fn, args in jobs}
+            for fut in as_completed(futures):
+                try:
+                    files += fut.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"[error] {futures[fut]}: {e}")
+    print(f"{len(jobs) - failed} figuras ({files} ficheros) en {output_dir} "
+          f"en {time.perf_counter() - t0:.1f} s, {failed} con error")
+    return failed
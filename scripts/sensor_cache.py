@@ -0,0 +1,46 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import requests
+
+# Caché local columnar por sensor: un Parquet con todas las lecturas ya
+# descargadas. En cada ejecución sólo se piden al API las filas posteriores
+# a la última (timestamp, id) guardada. Las filas que lleguen tarde con un
+# timestamp anterior no se recogen: borra el fichero para resincronizar.
+SENSOR_CACHE_DIR = os.getenv("SENSOR_CACHE_DIR", ".sensor_cache")
+
+def cache_path(sensor: str) -> str:
+    return os.path.join(SENSOR_CACHE_DIR, f"{sensor}.parquet")
+
+def _since(table: pa.Table) -> str:
+    # El export viene ordenado por (timestamp, id): la última fila es el cursor
+    last = table.slice(table.num_rows - 1, 1).to_pylist()[0]
+    return f"{last['timestamp'].isoformat()}|{last['id']}"
+
+def fetch_delta(api: str, sensor: str, since: str = None) -> pa.Table:
+    params = {'format': 'arrow'}
+    if since:
+        params['since'] = since
+    r = requests.get(f"{api}/{sensor}/export", params=params)
+    r.raise_for_status()
+    return pa.ipc.open_stream(pa.py_buffer(r.content)).read_all()
+
+def load_sensor(api: str, sensor: str) -> pd.DataFrame:
+    """Lecturas del sensor desde la caché local, completada con el delta del API."""
+    path = cache_path(sensor)
+    cached = pq.read_table(path) if os.path.exists(path) else None
+    since = _since(cached) if cached is not None and cached.num_rows else None
+    delta = fetch_delta(api, sensor, since)
+
+    if cached is None or delta.num_rows:
+        table = delta if cached is None else pa.concat_tables([cached, delta.cast(cached.schema)])
+        os.makedirs(SENSOR_CACHE_DIR, exist_ok=True)
+        # Escritura atómica: un fallo a medias no deja la caché corrupta
+        tmp = f"{path}.tmp"
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+    else:
+        table = cached
+    return table.to_pandas()
@@ -1,13 +1,14 @@
-import sys
+import argparse
+import os
 import requests
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 from datetime import datetime, timedelta
 
-# Pruebas inferenciales
-from scipy.stats import ttest_ind, f_oneway
-import statsmodels.stats.multicomp as mc
+from scripts.plot_batch import add_batch_args, finish, render_all
+from scripts.sensor_cache import load_sensor
+from utils.time_utils import get_period_bounds_and_label
 
 # Ajustes globales de estilo para fuentes y legibilidad
 plt.rcParams.update({
@@ -20,7 +21,8 @@ plt.rcParams.update({
     'figure.titlesize': 18
 })
 
-API = "http://127.0.0.1:8000"
+# SENSOR_API permite apuntar a la API de cada instalación
+API = os.getenv("SENSOR_API", "http://127.0.0.1:8000")
 
 # Umbrales críticos
 U_LPG      = 800.0    # ppm
@@ -31,10 +33,8 @@ U_LATENCY  = 200      # ms
 
 def fetch_all(sensor: str) -> pd.DataFrame:
     try:
-        r = requests.get(f"{API}/{sensor}/all")
-        r.raise_for_status()
-        data = r.json()
-        return pd.DataFrame(data) if data else pd.DataFrame()
+        # Caché local en Parquet: sólo se descargan las lecturas nuevas
+        return load_sensor(API, sensor)
     except:
         return pd.DataFrame()
 
@@ -73,7 +73,7 @@ def basic_stats(vals):
 def risk_prob(vals, U):
     return sum(v>U for v in vals)/len(vals) if vals else 0
 
-def plot_hist_donut(vals, U, xlabel, title_hist, title_donut):
+def plot_hist_donut(vals, U, xlabel, title_hist, title_donut, name="hist"):
     safe = [v for v in vals if v <= U]
     crit = [v for v in vals if v > U]
     fig, (axh, axd) = plt.subplots(1,2,figsize=(14,5))
@@ -105,20 +105,31 @@ def plot_hist_donut(vals, U, xlabel, title_hist, title_donut):
     axd.text(0.5, -0.15, f"Medida en {xlabel}", ha='center', va='top', transform=axd.transAxes)
 
     plt.tight_layout()
-    plt.show()
-
-def plot_timebar(df, field, period, unit, title):
-    if df.empty: return
-    df2 = df.copy()
+    finish(name, fig)
+
+def fetch_series(sensor: str, field: str, start, end, bucket: str) -> pd.Series:
+    # Medias por bucket calculadas en el servidor (/series), sin bajar las lecturas
+    r = requests.get(f"{API}/{sensor}/series", params={
+        'start': start.isoformat(), 'end': end.isoformat(),
+        'bucket': bucket, 'agg': 'mean', 'fields': field
+    })
+    r.raise_for_status()
+    data = r.json()
+    return pd.Series(data['series'][field]['mean'], index=pd.to_datetime(data['t']), dtype=float)
+
+def plot_timebar(sensor, field, period, unit, title, name="timebar"):
+    start, end, _ = get_period_bounds_and_label(period)
     if period == 'today':
-        df2['sub'] = df2['ts'].dt.hour
+        grp = fetch_series(sensor, field, start, end, '1h').dropna()
+        grp.index = grp.index.hour
         xlabel = "Hora"
     else:
-        df2['sub'] = df2['ts'].dt.date
+        grp = fetch_series(sensor, field, start, end, '1d').dropna()
+        grp.index = grp.index.date
         xlabel = "Fecha"
+    if grp.empty: return
 
-    grp = df2.groupby('sub')[field].mean()
-    plt.figure(figsize=(10,4))
+    fig = plt.figure(figsize=(10,4))
     bars = plt.bar(grp.index, grp.values, color='#1f77b4', edgecolor='k', alpha=0.8)
     plt.xlabel(xlabel)
     plt.ylabel(f"{field} ({unit})")
@@ -130,30 +141,182 @@ def plot_timebar(df, field, period, unit, title):
                  f"{v:.1f} {unit}", ha='center', va='bottom', fontsize=10)
 
     plt.tight_layout()
-    plt.show()
+    finish(name, fig)
+
+def plot_motion(dm, period, name="motion"):
+    rp = dm['motion_detected'].astype(int).mean()
+
+    # Preparamos los últimos 10 timestamps de detección
+    eventos = (
+        dm.loc[dm['motion_detected'], 'ts']
+          .sort_values()
+          .tail(10)
+          .dt.strftime('%Y-%m-%d %H:%M')
+          .tolist()
+    )
+
+    # Dibujamos el pie chart y la tabla lateral
+    fig, axes = plt.subplots(1, 2, figsize=(12, 6), dpi=100)
+    fig.subplots_adjust(wspace=0.4)
+
+    # 1) Pie chart
+    wedges, _, _ = axes[0].pie(
+        [1 - rp, rp],
+        labels=["No mov", "Mov"],
+        autopct="%1.1f%%",
+        startangle=90,
+        wedgeprops=dict(width=0.4, edgecolor='k'),
+        # Nota: no especificamos colores según instrucciones generales
+    )
+    axes[0].set_title(f"Movimiento ({period})", pad=20)
+    axes[0].legend(
+        wedges,
+        ["No mov", "Mov"],
+        title="Detección",
+        loc="center left",
+        bbox_to_anchor=(1, 0.5)
+    )
 
-def t_test(group1, group2, label1, label2):
-    if len(group1)>1 and len(group2)>1:
-        t, p = ttest_ind(group1, group2, equal_var=False)
-        sig = "Significativo" if p<0.05 else "No significativo"
-        print(f"t-test {label1} vs {label2}: t={t:.2f}, p={p:.3f} → {sig}")
+    # 2) Tabla o mensaje con los últimos 10 registros
+    axes[1].axis('off')
+    axes[1].set_title("Últimos 10 movimientos", pad=20)
+
+    if eventos:
+        cell_text = [[ts] for ts in eventos]
+        table = axes[1].table(
+            cellText=cell_text,
+            colLabels=["Timestamp"],
+            cellLoc='center',
+            loc='center'
+        )
+        table.auto_set_font_size(False)
+        table.set_fontsize(10)
+        table.scale(1, 1.5)
     else:
-        print(f"No suficientes datos para t-test entre {label1} y {label2}.")
-
-def anova_tukey(data_dict, field):
-    groups = [v for v in data_dict.values() if len(v)>1]
-    if len(groups)>=3:
-        F, p = f_oneway(*groups)
-        sig = "Diferencias" if p<0.05 else "Sin diferencias"
-        print(f"ANOVA {field}: F={F:.2f}, p={p:.3f} → {sig}")
-        df = pd.concat([pd.DataFrame({field:v,'grupo':k}) for k,v in data_dict.items() if len(v)>1])
-        tuk = mc.pairwise_tukeyhsd(df[field], df['grupo'], alpha=0.05)
-        print(tuk.summary())
+        axes[1].text(
+            0.5, 0.5,
+            "No hay eventos de movimiento\nen el periodo seleccionado",
+            ha='center', va='center',
+            fontsize=12,
+            bbox=dict(boxstyle='round,pad=0.5', facecolor='white', alpha=0.8)
+        )
+
+    plt.tight_layout()
+    finish(name, fig)
+
+def plot_lpg_box(gas_cmp, name="lpg_box"):
+    g_today, g_7 = gas_cmp['periods']
+    if g_today['n'] and g_7['n']:
+        # Cajas dibujadas desde los cuartiles que devuelve el servidor
+        boxes = [
+            {'label': lbl, 'med': s['median'], 'q1': s['q1'], 'q3': s['q3'],
+             'whislo': s['whislo'], 'whishi': s['whishi'], 'fliers': []}
+            for lbl, s in (('Hoy', g_today), ('Últimos 7 días', g_7))
+        ]
+        fig, ax = plt.subplots(figsize=(8,5))
+        bp = ax.bxp(boxes, patch_artist=True)
+        for patch, color in zip(bp['boxes'], ['#1f77b4','#2ca02c']):
+            patch.set_facecolor(color)
+        ax.grid(True)
+        ax.set_title("LPG: Hoy vs Últimos 7 días")
+        ax.set_ylabel("ppm")
+        plt.tight_layout()
+        finish(name, fig)
+
+def plot_pm_bars(pm_cmp, name="pm25_bars"):
+    p_m, p_lm = pm_cmp['periods']
+    if p_m['n'] and p_lm['n']:
+        means = [p_m['mean'], p_lm['mean']]
+        errs  = [p_m['sem'], p_lm['sem']]
+        labels = ['Mes actual','Mes anterior']
+        x = np.arange(len(labels))
+        fig = plt.figure(figsize=(8,5))
+        plt.bar(x, means, yerr=errs, capsize=6, edgecolor='k', alpha=0.8)
+        plt.xticks(x, labels)
+        plt.ylabel("PM2.5 (µg/m³)")
+        plt.title("Comparativa PM2.5 con error estándar")
+        for xi, m, e in zip(x, means, errs):
+            plt.text(xi, m + e + max(errs)*0.02, f"{m:.1f} µg/m³", ha='center', va='bottom')
+        plt.tight_layout()
+        finish(name, fig)
+
+def fetch_compare(sensor: str, field: str, periods) -> dict:
+    # Pruebas inferenciales calculadas en el servidor: una petición pequeña
+    r = requests.get(f"{API}/analysis/compare", params={
+        'sensor': sensor, 'field': field, 'periods': ",".join(periods)
+    })
+    r.raise_for_status()
+    return r.json()
+
+def fmt(x, spec):
+    # El servidor devuelve None cuando la prueba no está definida (NaN)
+    return "n/d" if x is None else format(x, spec)
+
+def print_compare(res, names):
+    if res['ttest']:
+        tt = res['ttest']
+        sig = "Significativo" if tt['significant'] else "No significativo"
+        print(f"t-test {names[tt['a']]} vs {names[tt['b']]}: t={fmt(tt['t'], '.2f')}, p={fmt(tt['p'], '.3f')} → {sig}")
+    elif res['anova']:
+        an = res['anova']
+        sig = "Diferencias" if an['significant'] else "Sin diferencias"
+        print(f"ANOVA {res['field']}: F={fmt(an['F'], '.2f')}, p={fmt(an['p'], '.3f')} → {sig}")
+        print(f"{'grupo1':<10}{'grupo2':<10}{'meandiff':>10}{'p-adj':>8}{'lower':>10}{'upper':>10}  reject")
+        for tk in res['tukey']:
+            print(f"{names[tk['a']]:<10}{names[tk['b']]:<10}{fmt(tk['meandiff'], '>10.3f')}"
+                  f"{fmt(tk['p_adj'], '>8.3f')}{fmt(tk['lower'], '>10.3f')}{fmt(tk['upper'], '>10.3f')}"
+                  f"  {tk['reject']}")
     else:
-        print(f"No hay suficientes grupos para ANOVA en {field}.")
+        print(f"No suficientes datos para comparar {res['field']}.")
+
+# Histograma + evolución por campo: (sensor, campo, umbral, unidad, etiqueta)
+BATCH_FIELDS = [
+    ("gas", "lpg", U_LPG, "ppm", "Gas LPG"),
+    ("gas", "co", U_CO, "ppm", "Gas CO"),
+    ("gas", "smoke", U_SMOKE, "ppm", "Gas Smoke"),
+    ("particle", "pm2_5", U_PM25, "µg/m³", "PM2.5"),
+    ("camera", "latency_ms", U_LATENCY, "ms", "Latencia"),
+]
+
+def batch_jobs(periods):
+    """Todas las figuras de todos los sensores y periodos, más las de inferencia."""
+    frames = {s: fetch_all(s) for s in ("gas", "particle", "motion", "camera")}
+    jobs = []
+    for period in periods:
+        for sensor, fld, U, unit, label in BATCH_FIELDS:
+            df = filter_by_period(frames[sensor], period)
+            if fld not in df or df.empty: continue
+            key = f"{period}/{sensor}_{fld}"
+            jobs.append((f"{key}_hist", plot_hist_donut, (
+                df[fld].tolist(), U, unit,
+                f"Hist {label} ({period})", f"Donut {label} ({period})"
+            )))
+            # La serie la calcula el servidor: el proceso sólo recibe el periodo
+            jobs.append((f"{key}_timebar", plot_timebar, (
+                sensor, fld, period, unit, f"{label} vs tiempo ({period})"
+            )))
+        dm = filter_by_period(frames["motion"], period)
+        if 'motion_detected' in dm and not dm.empty:
+            jobs.append((f"{period}/motion", plot_motion, (dm[['ts', 'motion_detected']], period)))
+
+    # Las gráficas de inferencia comparan periodos fijos
+    jobs.append(("inference/lpg_box", plot_lpg_box,
+                 (fetch_compare("gas", "lpg", ['today', 'last7']),)))
+    jobs.append(("inference/pm25_bars", plot_pm_bars,
+                 (fetch_compare("particle", "pm2_5", ['month', 'lastmonth']),)))
+    return jobs
 
 def main():
-    period = sys.argv[1] if len(sys.argv)>1 else "today"
+    parser = argparse.ArgumentParser(description="Riesgo e inferencia por sensor")
+    parser.add_argument("period", nargs="?", default="today")
+    add_batch_args(parser)
+    args = parser.parse_args()
+    if args.batch:
+        jobs = batch_jobs(args.periods.split(","))
+        failed = render_all(jobs, args.batch, args.formats.split(","), args.workers)
+        raise SystemExit(1 if failed else 0)
+
+    period = args.period
     print(f"=== Reporte periodo: {period} ===")
 
     # --- 1) Estadísticas + gráficos por sensor ---
@@ -176,7 +339,7 @@ def main():
                 f"Donut Gas {title_lbl} ({period})"
             )
             plot_timebar(
-                dg, fld, period, unit,
+                "gas", fld, period, unit,
                 f"Gas {title_lbl} vs tiempo ({period})"
             )
 
@@ -194,75 +357,16 @@ def main():
             f"Donut PM2.5 ({period})"
         )
         plot_timebar(
-            dp, 'pm2_5', period, "µg/m³",
+            "particle", 'pm2_5', period, "µg/m³",
             f"PM2.5 vs tiempo ({period})"
         )
 
     # Movimiento
     dm = filter_by_period(fetch_all("motion"), period)
     if 'motion_detected' in dm and not dm.empty:
-        dm['val'] = dm['motion_detected'].astype(int)
-        rp = dm['val'].mean()
+        rp = dm['motion_detected'].astype(int).mean()
         print(f"\nMovimiento: P(detect)={rp:.2%}, N={len(dm)}")
-
-        # Preparamos los últimos 10 timestamps de detección
-        eventos = (
-            dm.loc[dm['motion_detected'], 'ts']
-              .sort_values()
-              .tail(10)
-              .dt.strftime('%Y-%m-%d %H:%M')
-              .tolist()
-        )
-
-        # Dibujamos el pie chart y la tabla lateral
-        fig, axes = plt.subplots(1, 2, figsize=(12, 6), dpi=100)
-        fig.subplots_adjust(wspace=0.4)
-
-        # 1) Pie chart
-        wedges, _, _ = axes[0].pie(
-            [1 - rp, rp],
-            labels=["No mov", "Mov"],
-            autopct="%1.1f%%",
-            startangle=90,
-            wedgeprops=dict(width=0.4, edgecolor='k'),
-            # Nota: no especificamos colores según instrucciones generales
-        )
-        axes[0].set_title(f"Movimiento ({period})", pad=20)
-        axes[0].legend(
-            wedges,
-            ["No mov", "Mov"],
-            title="Detección",
-            loc="center left",
-            bbox_to_anchor=(1, 0.5)
-        )
-
-        # 2) Tabla o mensaje con los últimos 10 registros
-        axes[1].axis('off')
-        axes[1].set_title("Últimos 10 movimientos", pad=20)
-
-        if eventos:
-            cell_text = [[ts] for ts in eventos]
-            table = axes[1].table(
-                cellText=cell_text,
-                colLabels=["Timestamp"],
-                cellLoc='center',
-                loc='center'
-            )
-            table.auto_set_font_size(False)
-            table.set_fontsize(10)
-            table.scale(1, 1.5)
-        else:
-            axes[1].text(
-                0.5, 0.5,
-                "No hay eventos de movimiento\nen el periodo seleccionado",
-                ha='center', va='center',
-                fontsize=12,
-                bbox=dict(boxstyle='round,pad=0.5', facecolor='white', alpha=0.8)
-            )
-
-        plt.tight_layout()
-        plt.show()
-
+        plot_motion(dm, period)
 
     # Cámara
     dc = filter_by_period(fetch_all("camera"), period)
@@ -278,60 +382,25 @@ def main():
             f"Donut Latencia ({period})"
         )
         plot_timebar(
-            dc, 'latency_ms', period, "ms",
+            "camera", 'latency_ms', period, "ms",
             f"Latencia vs tiempo ({period})"
         )
 
     # --- 2) Pruebas inferenciales ---
     print("\n=== PRUEBAS INFERENCIALES ===")
-    g_today = filter_by_period(fetch_all("gas"), 'today')['lpg'].tolist()
-    g_7     = filter_by_period(fetch_all("gas"), 'last7')['lpg'].tolist()
-    t_test(g_today, g_7, "LPG hoy", "LPG últimos 7d")
-
-    p_m    = filter_by_period(fetch_all("particle"), 'month')['pm2_5'].tolist()
-    p_lm   = filter_by_period(fetch_all("particle"), 'lastmonth')['pm2_5'].tolist()
-    t_test(p_m, p_lm, "PM2.5 mes actual", "PM2.5 mes anterior")
-
-    c_periods = {
-        'Hoy':  filter_by_period(fetch_all("camera"), 'today')['latency_ms'].tolist(),
-        '7d':   filter_by_period(fetch_all("camera"), 'last7')['latency_ms'].tolist(),
-        'Mes':  filter_by_period(fetch_all("camera"), 'month')['latency_ms'].tolist(),
-    }
-    anova_tukey(c_periods, 'latency_ms')
+    gas_cmp = fetch_compare("gas", "lpg", ['today', 'last7'])
+    print_compare(gas_cmp, {'today': "LPG hoy", 'last7': "LPG últimos 7d"})
+
+    pm_cmp = fetch_compare("particle", "pm2_5", ['month', 'lastmonth'])
+    print_compare(pm_cmp, {'month': "PM2.5 mes actual", 'lastmonth': "PM2.5 mes anterior"})
+
+    cam_cmp = fetch_compare("camera", "latency_ms", ['today', 'last7', 'month'])
+    print_compare(cam_cmp, {'today': 'Hoy', 'last7': '7d', 'month': 'Mes'})
 
     # --- 3) Gráficas de inferencia ---
     print("\n=== GRÁFICAS DE INFERENCIA ===")
-    if g_today and g_7:
-        df1 = pd.DataFrame({'lpg':g_today,'periodo':'Hoy'})
-        df2 = pd.DataFrame({'lpg':g_7,'periodo':'Últimos 7 días'})
-        df_c = pd.concat([df1,df2])
-        fig, ax = plt.subplots(figsize=(8,5))
-        bp = df_c.boxplot(column='lpg', by='periodo', ax=ax, patch_artist=True, grid=True)
-        for patch, color in zip(ax.artists, ['#1f77b4','#2ca02c']):
-            patch.set_facecolor(color)
-        plt.suptitle("")
-        ax.set_title("LPG: Hoy vs Últimos 7 días")
-        ax.set_ylabel("ppm")
-        plt.tight_layout()
-        plt.show()
-
-    if p_m and p_lm:
-        means = [np.mean(p_m), np.mean(p_lm)]
-        errs  = [
-            np.std(p_m, ddof=1)/np.sqrt(len(p_m)),
-            np.std(p_lm, ddof=1)/np.sqrt(len(p_lm))
-        ]
-        labels = ['Mes actual','Mes anterior']
-        x = np.arange(len(labels))
-        plt.figure(figsize=(8,5))
-        plt.bar(x, means, yerr=errs, capsize=6, edgecolor='k', alpha=0.8)
-        plt.xticks(x, labels)
-        plt.ylabel("PM2.5 (µg/m³)")
-        plt.title("Comparativa PM2.5 con error estándar")
-        for xi, m, e in zip(x, means, errs):
-            plt.text(xi, m + e + max(errs)*0.02, f"{m:.1f} µg/m³", ha='center', va='bottom')
-        plt.tight_layout()
-        plt.show()
+    plot_lpg_box(gas_cmp)
+    plot_pm_bars(pm_cmp)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,118 @@
+import threading
+from collections import OrderedDict
+from itertools import combinations
+from typing import List
+
+import numpy as np
+from scipy.stats import f_oneway, ttest_ind
+from statsmodels.stats.multicomp import pairwise_tukeyhsd
+from sqlalchemy.orm import Session
+
+from services.archive_service import merge_archived_watermark
+from services.columnar import read_columns
+from services.sensor_config import SENSOR_FIELDS, SENSOR_MODELS
+from services.stats_utils import query_watermark
+from utils.time_utils import get_period_bounds_and_label
+
+# Resultados por (sensor, campo, periodos, alpha, marca de agua): si los
+# datos no cambian, la comparación se sirve sin volver a leerlos
+COMPARE_CACHE_SIZE = 256
+_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+_lock = threading.Lock()
+
+def _describe(values: np.ndarray) -> dict:
+    n = len(values)
+    if n == 0:
+        return {'n': 0}
+    q1, med, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    # Bigotes al estilo de matplotlib (1.5 IQR dentro de los datos), para bxp
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    std = float(np.std(values, ddof=1)) if n > 1 else 0.0
+    return {
+        'n': n,
+        'mean': float(values.mean()),
+        'std': std,
+        'sem': std / np.sqrt(n),
+        'min': float(values.min()),
+        'q1': float(q1),
+        'median': float(med),
+        'q3': float(q3),
+        'max': float(values.max()),
+        'whislo': float(inside.min()),
+        'whishi': float(inside.max()),
+    }
+
+def _num(x):
+    # NaN/inf (p. ej. grupos idénticos) no son JSON válido: se devuelven como None
+    x = float(x)
+    return x if np.isfinite(x) else None
+
+def _tests(groups: dict, alpha: float) -> dict:
+    # Sólo entran los periodos con al menos dos lecturas
+    valid = {k: v for k, v in groups.items() if len(v) > 1}
+    out = {'ttest': None, 'anova': None, 'tukey': None}
+    if len(valid) == 2:
+        (a, va), (b, vb) = valid.items()
+        t, p = ttest_ind(va, vb, equal_var=False)
+        out['ttest'] = {'a': a, 'b': b, 't': _num(t), 'p': _num(p),
+                        'significant': bool(p < alpha)}
+    elif len(valid) >= 3:
+        F, p = f_oneway(*valid.values())
+        out['anova'] = {'F': _num(F), 'p': _num(p), 'significant': bool(p < alpha)}
+        endog = np.concatenate(list(valid.values()))
+        labels = np.concatenate([np.full(len(v), k) for k, v in valid.items()])
+        tuk = pairwise_tukeyhsd(endog, labels, alpha=alpha)
+        pairs = combinations(tuk.groupsunique.tolist(), 2)
+        out['tukey'] = [
+            {'a': a, 'b': b, 'meandiff': _num(d), 'p_adj': _num(p),
+             'lower': _num(lo), 'upper': _num(hi), 'reject': bool(r)}
+            for (a, b), d, p, (lo, hi), r in zip(
+                pairs, tuk.meandiffs, tuk.pvalues, tuk.confint, tuk.reject
+            )
+        ]
+    return out
+
+def compare_periods(db: Session, sensor: str, field: str, periods: List[str],
+                    alpha: float = 0.05) -> dict:
+    """
+    Compara un campo entre periodos (today, last7, month, lastmonth):
+    resumen por periodo y t de Welch (2 periodos) o ANOVA + Tukey (3 o más).
+    Lee una sola vez la columna sobre la unión de los rangos.
+    Lanza ValueError si el sensor, el campo o un periodo no son válidos.
+    """
+    if sensor not in SENSOR_FIELDS or field not in SENSOR_FIELDS[sensor]:
+        raise ValueError(f"Campo desconocido: {sensor}.{field}")
+    if len(periods) < 2:
+        raise ValueError("Hacen falta al menos dos periodos")
+    bounds = {p: get_period_bounds_and_label(p) for p in periods}
+    start = min(b[0] for b in bounds.values())
+    end = max(b[1] for b in bounds.values())
+
+    watermark = merge_archived_watermark(
+        sensor, query_watermark(db, SENSOR_MODELS[sensor], start, end), start, end
+    )
+    key = (sensor, field, tuple(periods), alpha, start.date(), *watermark)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    cols = read_columns(db, sensor, ['timestamp', field], start, end, as_arrays=True)
+    ts, values = cols['timestamp'], cols[field]
+    groups, summary = {}, []
+    for p, (s, e, label) in bounds.items():
+        # Las lecturas vienen ordenadas por timestamp: cada periodo es un tramo
+        lo = np.searchsorted(ts, np.datetime64(s, 'us'), side='left')
+        hi = np.searchsorted(ts, np.datetime64(e, 'us'), side='right')
+        groups[p] = values[lo:hi]
+        summary.append({'period': p, 'label': label, 'start': s, 'end': e,
+                        **_describe(groups[p])})
+
+    result = {'sensor': sensor, 'field': field, 'alpha': alpha,
+              'periods': summary, **_tests(groups, alpha)}
+    with _lock:
+        _cache[key] = result
+        while len(_cache) > COMPARE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
@@ -0,0 +1,279 @@
+import heapq
+import json
+import os
+import uuid
+from datetime import date, datetime, time, timedelta
+from itertools import chain, islice
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from sqlalchemy import delete, exists, func, select
+from sqlalchemy.orm import Session
+
+from services.export_service import arrow_schema, rows_to_batch
+from services.pagination import STREAM_CHUNK_SIZE, Cursor
+from services.sensor_config import SENSOR_MODELS
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = pc = pq = None
+
+# Archivo frío: {ARCHIVE_DIR}/{sensor}/date=YYYY-MM-DD/part-*.parquet
+ARCHIVE_DIR          = os.getenv("ARCHIVE_DIR", ".archive")
+ARCHIVE_AFTER_DAYS   = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_DELETE_BATCH = int(os.getenv("ARCHIVE_DELETE_BATCH", "2000"))
+# Las capturas referencian motion (ON DELETE CASCADE): se archivan antes
+ARCHIVE_ORDER = ('gas', 'particle', 'camera', 'motion')
+
+_MANIFEST = "_manifest.json"
+_boundaries: dict = {}
+
+def _sensor_dir(sensor: str) -> str:
+    return os.path.join(ARCHIVE_DIR, sensor)
+
+def _day_dir(sensor: str, day: date) -> str:
+    return os.path.join(_sensor_dir(sensor), f"date={day.isoformat()}")
+
+def archived_before(sensor: str) -> Optional[datetime]:
+    """
+    Límite de la ventana caliente: las lecturas anteriores pueden estar
+    en el archivo. None si el sensor nunca se ha archivado.
+    """
+    path = os.path.join(_sensor_dir(sensor), _MANIFEST)
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+    cached = _boundaries.get(sensor)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path) as fh:
+        boundary = datetime.fromisoformat(json.load(fh)["archived_before"])
+    _boundaries[sensor] = (mtime, boundary)
+    return boundary
+
+def _set_archived_before(sensor: str, boundary: datetime):
+    current = archived_before(sensor)
+    if current and current >= boundary:
+        return
+    path = os.path.join(_sensor_dir(sensor), _MANIFEST)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump({"archived_before": boundary.isoformat()}, fh)
+    os.replace(tmp, path)
+
+def reaches_archive(sensor: str, start: datetime) -> bool:
+    boundary = archived_before(sensor)
+    return pq is not None and boundary is not None and start < boundary
+
+def _partitions(sensor: str, start: datetime, end: datetime) -> List[str]:
+    # Poda por partición: sólo los directorios de días dentro del rango
+    base = _sensor_dir(sensor)
+    if not os.path.isdir(base):
+        return []
+    first, last = start.date().isoformat(), end.date().isoformat()
+    return [
+        os.path.join(base, name)
+        for name in sorted(os.listdir(base))
+        if name.startswith("date=") and first <= name[5:] <= last
+    ]
+
+def _read_day(day: str, names: List[str], start: datetime, end: datetime,
+              after: Optional[Cursor] = None) -> "pa.Table":
+    table = pq.read_table(day, columns=names)
+    ts = table.column("timestamp")
+    mask = pc.and_(
+        pc.greater_equal(ts, pa.scalar(start, pa.timestamp('us'))),
+        pc.less_equal(ts, pa.scalar(end, pa.timestamp('us'))),
+    )
+    if after is not None:
+        # Misma condición keyset que after_cursor sobre (timestamp, id)
+        after_ts = pa.scalar(after[0], pa.timestamp('us'))
+        mask = pc.and_(mask, pc.or_(
+            pc.greater(ts, after_ts),
+            pc.and_(pc.equal(ts, after_ts),
+                    pc.greater(table.column("id"), pa.scalar(after[1], pa.string()))),
+        ))
+    # Un día re-archivado tiene varias partes: se ordena el día entero
+    return table.filter(mask).sort_by([("timestamp", "ascending"), ("id", "ascending")])
+
+def read_archive(sensor: str, start: datetime, end: datetime,
+                 columns: Optional[List[str]] = None) -> "pa.Table":
+    """Lecturas archivadas del rango como tabla Arrow, ordenadas por (timestamp, id)."""
+    schema = arrow_schema(SENSOR_MODELS[sensor])
+    columns = columns or schema.names
+    names = list(dict.fromkeys(["timestamp", "id", *columns]))
+    # Cada día sale ordenado y los días van en orden: basta concatenar
+    tables = [_read_day(day, names, start, end) for day in _partitions(sensor, start, end)]
+    if not tables:
+        return pa.schema([schema.field(c) for c in columns]).empty_table()
+    return pa.concat_tables(tables).select(columns)
+
+def iter_archive(sensor: str, start: datetime, end: datetime,
+                 after: Optional[Cursor] = None) -> Iterator[List[tuple]]:
+    """
+    Lotes de tuplas archivadas (columnas del modelo, en su orden) del
+    rango, en orden (timestamp, id) y posteriores a `after`. Lee una
+    partición de día cada vez: los días no se solapan.
+    """
+    if after is not None:
+        start = max(start, after[0])
+    if not reaches_archive(sensor, start):
+        return
+    names = arrow_schema(SENSOR_MODELS[sensor]).names
+    for day in _partitions(sensor, start, end):
+        table = _read_day(day, names, start, end, after)
+        rows = list(zip(*(table.column(n).to_pylist() for n in names)))
+        for i in range(0, len(rows), STREAM_CHUNK_SIZE):
+            yield rows[i:i + STREAM_CHUNK_SIZE]
+
+def merge_batches(hot: Iterable[List], cold: Iterable[List],
+                  key: Callable) -> Iterator[List]:
+    """
+    Mezcla dos flujos de lotes ya ordenados por `key` en uno solo, en
+    lotes de STREAM_CHUNK_SIZE. Las filas calientes pueden ser anteriores
+    a las archivadas (llegadas tardías, motion referenciado).
+    """
+    rows = heapq.merge(chain.from_iterable(cold), chain.from_iterable(hot), key=key)
+    while True:
+        chunk = list(islice(rows, STREAM_CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+def read_archived_page(sensor: str, after: Optional[Cursor], limit: int) -> list:
+    """Las primeras `limit` lecturas archivadas tras `after`, como instancias del modelo."""
+    model = SENSOR_MODELS[sensor]
+    names = arrow_schema(model).names
+    rows = islice(chain.from_iterable(iter_archive(sensor, datetime.min, datetime.max, after)), limit)
+    return [model(**dict(zip(names, row))) for row in rows]
+
+def read_archived_rows(sensor: str, start: datetime, end: datetime) -> list:
+    """Lecturas archivadas como instancias (transitorias) del modelo."""
+    if not reaches_archive(sensor, start):
+        return []
+    model = SENSOR_MODELS[sensor]
+    table = read_archive(sensor, start, end)
+    return [model(**row) for row in table.to_pylist()]
+
+def merge_archived_stats(sensor: str, stats: dict, risk: dict, start: datetime,
+                         end: datetime, fields: List[str], thresholds=None):
+    """
+    Combina el (stats, risk) de la tabla caliente con el del archivo
+    cuando el rango llega más allá de la ventana caliente.
+    """
+    if not reaches_archive(sensor, start):
+        return stats, risk
+    thresholds = thresholds or {}
+    table = read_archive(sensor, start, end, list(dict.fromkeys([*fields, *thresholds])))
+    extra = table.num_rows
+    if not extra:
+        return stats, risk
+    hot = stats['count']
+    count = hot + extra
+    merged = {}
+    for f in fields:
+        col = table.column(f)
+        lo_hi = pc.min_max(col).as_py()
+        total = pc.sum(col).as_py()
+        if hot:
+            s = stats[f]
+            merged[f] = {
+                'mean': (s['mean'] * hot + total) / count,
+                'min': min(s['min'], lo_hi['min']),
+                'max': max(s['max'], lo_hi['max']),
+            }
+        else:
+            merged[f] = {'mean': total / count, 'min': lo_hi['min'], 'max': lo_hi['max']}
+    merged['count'] = count
+    merged_risk = {}
+    for f, U in thresholds.items():
+        over = pc.sum(pc.greater(table.column(f), U)).as_py() or 0
+        merged_risk[f] = (risk.get(f, 0) * hot + over) / count
+    return merged, merged_risk
+
+def merge_archived_watermark(sensor: str, watermark, start: datetime, end: datetime):
+    if not reaches_archive(sensor, start):
+        return watermark
+    ts = read_archive(sensor, start, end, ["timestamp"]).column("timestamp")
+    if not len(ts):
+        return watermark
+    max_ts, count = watermark
+    archived_max = pc.max(ts).as_py()
+    return max(filter(None, [max_ts, archived_max])), count + len(ts)
+
+def _archived_ids(sensor: str, day: date) -> set:
+    # Ids ya escritos en la partición del día (reintentos tras un fallo)
+    path = _day_dir(sensor, day)
+    if not os.path.isdir(path):
+        return set()
+    return set(pq.read_table(path, columns=["id"]).column("id").to_pylist())
+
+def _archive_day(db: Session, sensor: str, day_start: datetime, day_end: datetime) -> int:
+    model = SENSOR_MODELS[sensor]
+    schema = arrow_schema(model)
+    stmt = (
+        select(*model.__table__.c)
+        .where(model.timestamp >= day_start, model.timestamp < day_end)
+        .order_by(model.timestamp, model.id)
+        .execution_options(yield_per=STREAM_CHUNK_SIZE)
+    )
+    if sensor == 'motion':
+        # Los movimientos con capturas aún calientes se quedan en la BD
+        from models.camera import CameraCapture
+        stmt = stmt.where(~exists().where(CameraCapture.motion_id == model.id))
+
+    already = _archived_ids(sensor, day_start.date())
+    id_pos = schema.names.index("id")
+    ids: List[str] = []
+    writer = None
+    out_dir = _day_dir(sensor, day_start.date())
+    tmp = os.path.join(out_dir, f".part-{uuid.uuid4().hex}.tmp")
+    try:
+        for partition in db.execute(stmt).partitions():
+            rows = [tuple(r) for r in partition]
+            ids.extend(r[id_pos] for r in rows)
+            rows = [r for r in rows if r[id_pos] not in already]
+            if not rows:
+                continue
+            if writer is None:
+                os.makedirs(out_dir, exist_ok=True)
+                writer = pq.ParquetWriter(tmp, schema, compression='snappy')
+            writer.write_batch(rows_to_batch(schema, rows))
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is not None:
+        os.replace(tmp, os.path.join(out_dir, f"part-{uuid.uuid4().hex[:12]}.parquet"))
+
+    # Borrado en lotes acotados, sólo después de que el fichero exista
+    for i in range(0, len(ids), ARCHIVE_DELETE_BATCH):
+        db.execute(delete(model).where(model.id.in_(ids[i:i + ARCHIVE_DELETE_BATCH])))
+        db.commit()
+    return len(ids)
+
+def archive_sensor(db: Session, sensor: str, before: datetime) -> int:
+    """
+    Mueve al archivo las lecturas anteriores a `before` (alineado a día),
+    un día cada vez. Devuelve las filas archivadas.
+    """
+    if pq is None:
+        raise RuntimeError("El archivo frío requiere pyarrow")
+    before = datetime.combine(before.date(), time.min)
+    model = SENSOR_MODELS[sensor]
+    lo = db.query(func.min(model.timestamp)).filter(model.timestamp < before).scalar()
+    moved = 0
+    if lo is not None:
+        day_start = datetime.combine(lo.date(), time.min)
+        while day_start < before:
+            moved += _archive_day(db, sensor, day_start, day_start + timedelta(days=1))
+            day_start += timedelta(days=1)
+    os.makedirs(_sensor_dir(sensor), exist_ok=True)
+    _set_archived_before(sensor, before)
+    return moved
+
+def archive_all(db: Session, older_than_days: int = ARCHIVE_AFTER_DAYS) -> dict:
+    before = datetime.now() - timedelta(days=older_than_days)
+    return {s: archive_sensor(db, s, before) for s in ARCHIVE_ORDER}
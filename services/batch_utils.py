@@ -0,0 +1,85 @@
+import math
+from typing import List, Tuple
+from uuid import uuid4
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from services.rollup_service import apply_rollups
+from services.sensor_config import field_limits, quantize, quantize_row
+from utils.metrics import INGESTED_READINGS
+
+# Límite de lecturas por petición de lote
+MAX_BATCH_SIZE = 5000
+
+def validate_batch(schema, sensor: str, items: list) -> Tuple[List[Tuple[int, BaseModel]], List[dict]]:
+    """
+    Valida cada elemento por separado para que una fila inválida
+    no rechace el lote completo. Devuelve (válidos, errores).
+    """
+    valid, errors = [], []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({'index': i, 'errors': ['se esperaba un objeto JSON']})
+            continue
+        try:
+            data = schema(**item)
+        except ValidationError as e:
+            errors.append({
+                'index': i,
+                'errors': [
+                    f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}"
+                    for err in e.errors()
+                ],
+            })
+            continue
+        out_of_range = range_errors(sensor, data)
+        if out_of_range:
+            errors.append({'index': i, 'errors': out_of_range})
+        else:
+            valid.append((i, data))
+    return valid, errors
+
+def range_errors(sensor: str, data: BaseModel) -> List[str]:
+    # Un valor que no cabe en su DECIMAL(p, s) tumbaría el INSERT
+    # multi-fila entero (modo estricto de MySQL): se rechaza por elemento
+    errors = []
+    for f, (precision, scale) in field_limits(sensor).items():
+        value = getattr(data, f)
+        if not math.isfinite(value) or abs(quantize(value, scale)) >= 10 ** (precision - scale):
+            errors.append(f"{f}: fuera de rango para DECIMAL({precision},{scale})")
+    return errors
+
+def insert_batch(db: Session, model, sensor: str, rows: List[dict]) -> List[str]:
+    """
+    Inserta todas las filas en una sola transacción con un INSERT
+    multi-fila, junto con sus rollups. Los ids se generan aquí para no
+    tener que releerlos. Las filas se normalizan en sitio a lo que guarda
+    la BD (escala DECIMAL, timestamp sin zona), así caché, estadísticas y
+    feed ven lo guardado.
+    """
+    if not rows:
+        return []
+    for row in rows:
+        quantize_row(sensor, row)
+        ts = row['timestamp']
+        if ts.tzinfo is not None:
+            # DateTime sin zona: el driver guarda la hora tal cual y descarta el offset
+            row['timestamp'] = ts.replace(tzinfo=None)
+        row['id'] = str(uuid4())
+    try:
+        db.execute(insert(model), rows)
+        apply_rollups(db, sensor, rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    INGESTED_READINGS.inc(sensor, "batch", amount=len(rows))
+    return [row['id'] for row in rows]
+
+def batch_result(ids: List[str], errors: List[dict]) -> dict:
+    return {
+        'inserted': len(ids),
+        'ids': ids,
+        'errors': sorted(errors, key=lambda e: e['index']),
+    }
@@ -1,18 +1,99 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.camera import CameraCapture
-from schemas.camera import CameraDataCreate
+from models.motion import MotionSensor
+from schemas.camera import CameraDataCreate, CameraDataRead
+from services.archive_service import (
+    merge_archived_stats,
+    merge_archived_watermark,
+    read_archived_rows
+)
+from services.batch_utils import validate_batch, insert_batch, batch_result
+from services.export_service import export_readings
+from services.pagination import Cursor, get_page, stream_ndjson
+from services.stats_utils import query_stats, query_watermark
+from services.latest_cache import latest_cache, row_to_dict
+from services.live_feed import live_feed
+from services.online_stats import online_stats
+from services.rollup_service import apply_rollups
+from utils.metrics import INGESTED_READINGS
 
 def create_camera(db: Session, data: CameraDataCreate) -> CameraCapture:
-    obj = CameraCapture(**data.dict())
+    row = data.dict()
+    obj = CameraCapture(**row)
     db.add(obj)
+    apply_rollups(db, "camera", [row])
     db.commit()
     db.refresh(obj)
+    row = row_to_dict(obj)
+    latest_cache.update("camera", row)
+    online_stats.update("camera", row)
+    live_feed.publish("camera", row)
+    INGESTED_READINGS.inc("camera", "single")
     return obj
 
+def create_camera_batch(db: Session, items: list) -> dict:
+    valid, errors = validate_batch(CameraDataCreate, "camera", items)
+    # Rechaza por elemento las capturas cuyo motion_id no existe,
+    # en lugar de dejar que la FK tumbe el INSERT completo
+    motion_ids = {d.motion_id for _, d in valid}
+    existing = {
+        mid for (mid,) in
+        db.query(MotionSensor.id).filter(MotionSensor.id.in_(motion_ids))
+    } if motion_ids else set()
+    rows = []
+    for i, d in valid:
+        if d.motion_id in existing:
+            rows.append(d.dict())
+        else:
+            errors.append({'index': i, 'errors': [f"motion_id: no existe {d.motion_id}"]})
+    ids = insert_batch(db, CameraCapture, "camera", rows)
+    latest_cache.update_many("camera", rows)
+    online_stats.update_many("camera", rows)
+    live_feed.publish_many("camera", rows)
+    return batch_result(ids, errors)
+
 def get_camera(db: Session, start, end) -> List[CameraCapture]:
-    return (
+    hot = (
         db.query(CameraCapture)
           .filter(CameraCapture.timestamp >= start, CameraCapture.timestamp <= end)
           .all()
     )
+    return read_archived_rows("camera", start, end) + hot
+
+def get_camera_stats(db: Session, start, end, fields, thresholds=None):
+    stats, risk = query_stats(db, CameraCapture, fields, start, end, thresholds)
+    return merge_archived_stats("camera", stats, risk, start, end, fields, thresholds)
+
+def get_camera_watermark(db: Session, start, end):
+    watermark = query_watermark(db, CameraCapture, start, end)
+    return merge_archived_watermark("camera", watermark, start, end)
+
+def get_camera_page(db: Session, after: Optional[Cursor], limit: int):
+    return get_page(db, CameraCapture, after, limit)
+
+def stream_camera(after: Optional[Cursor]):
+    return stream_ndjson(CameraCapture, CameraDataRead, after)
+
+def export_camera(start: datetime, end: datetime, fmt: str, after: Optional[Cursor] = None):
+    return export_readings(CameraCapture, start, end, fmt, after)
+
+# Versiones async: ejecutan la misma lógica sobre una AsyncSession
+# (run_sync), de modo que la E/S va por el driver asíncrono sin ocupar hilos.
+
+async def create_camera_async(db: AsyncSession, data):
+    return await db.run_sync(create_camera, data)
+
+async def create_camera_batch_async(db: AsyncSession, items: list) -> dict:
+    return await db.run_sync(create_camera_batch, items)
+
+async def get_camera_async(db: AsyncSession, start, end):
+    return await db.run_sync(get_camera, start, end)
+
+async def get_camera_page_async(db: AsyncSession, after: Optional[Cursor], limit: int):
+    return await db.run_sync(get_camera_page, after, limit)
+
+async def get_camera_stats_async(db: AsyncSession, start, end, fields, thresholds=None):
+    return await db.run_sync(get_camera_stats, start, end, fields, thresholds)
@@ -0,0 +1,90 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from sqlalchemy import Float, Integer, Numeric, cast, func, literal_column, select, type_coerce
+from sqlalchemy.orm import Session
+
+from services.archive_service import read_archive, reaches_archive
+from services.pagination import STREAM_CHUNK_SIZE
+from services.sensor_config import SENSOR_MODELS
+
+# Lectura proyectada sin ORM: sólo las columnas pedidas, por SQLAlchemy Core,
+# sin identity map ni Decimal. Los DECIMAL se convierten en SQL a float
+# (o a enteros escalados, p. ej. 12.34 -> 1234 con scale=2).
+
+def column_scale(sensor: str, column: str) -> Optional[int]:
+    """Decimales de una columna DECIMAL; None si no lo es."""
+    typ = SENSOR_MODELS[sensor].__table__.c[column].type
+    return typ.scale if isinstance(typ, Numeric) and not isinstance(typ, Float) else None
+
+def _projected(sensor: str, column: str, scaled: bool):
+    col = SENSOR_MODELS[sensor].__table__.c[column]
+    scale = column_scale(sensor, column)
+    if scale is None:
+        return col
+    if scaled:
+        return cast(func.round(col * 10 ** scale), Integer).label(column)
+    # MySQL no admite CAST AS FLOAT: sumar 0E0 fuerza aritmética DOUBLE
+    return type_coerce(col + literal_column("0E0"), Float).label(column)
+
+def _dtype(sensor: str, column: str, scaled: bool):
+    scale = column_scale(sensor, column)
+    if scale is not None:
+        return np.int64 if scaled else np.float64
+    typ = SENSOR_MODELS[sensor].__table__.c[column].type.python_type
+    if typ is datetime:
+        return 'datetime64[us]'
+    if typ in (int, bool, float):
+        return np.dtype(typ)
+    return object
+
+def read_columns(db: Session, sensor: str, columns: Sequence[str],
+                 start: datetime, end: datetime, system_id: Optional[str] = None,
+                 scaled: bool = False, as_arrays: bool = False
+                 ) -> Union[List[tuple], Dict[str, np.ndarray]]:
+    """
+    Lecturas del rango con sólo `columns`, ordenadas por (timestamp, id).
+    Devuelve una lista de tuplas o, con as_arrays, un array NumPy por
+    columna. Incluye el archivo frío si el rango llega hasta él.
+    """
+    model = SENSOR_MODELS[sensor]
+    archived = reaches_archive(sensor, start)
+    # Con archivo hay que reordenar la mezcla: timestamp e id son la clave
+    wanted = list(dict.fromkeys([*columns, 'timestamp', 'id'])) if archived else list(columns)
+    stmt = (
+        select(*[_projected(sensor, c, scaled) for c in wanted])
+        .where(model.timestamp >= start, model.timestamp <= end)
+        .order_by(model.timestamp, model.id)
+        .execution_options(yield_per=STREAM_CHUNK_SIZE)
+    )
+    if system_id is not None:
+        stmt = stmt.where(model.system_id == str(system_id))
+    hot = [tuple(row) for part in db.execute(stmt).partitions() for row in part]
+    if not archived and not as_arrays:
+        return hot
+
+    out = {}
+    cols = list(zip(*hot)) if hot else [()] * len(wanted)
+    for c, values in zip(wanted, cols):
+        out[c] = np.array(values, dtype=_dtype(sensor, c, scaled))
+
+    if archived:
+        table = read_archive(sensor, start, end, list(dict.fromkeys([*wanted, 'system_id'])))
+        if system_id is not None:
+            mask = np.asarray(table.column('system_id').to_numpy(zero_copy_only=False)) == str(system_id)
+            table = table.filter(mask)
+        for c in wanted:
+            cold = table.column(c).to_numpy(zero_copy_only=False)
+            scale = column_scale(sensor, c)
+            if scaled and scale is not None:
+                cold = np.rint(cold * 10 ** scale).astype(np.int64)
+            out[c] = np.concatenate([cold.astype(out[c].dtype), out[c]])
+        # Filas conservadas en caliente (p. ej. motion referenciado) pueden
+        # ser anteriores a las archivadas: orden estable por (timestamp, id)
+        order = np.lexsort((out['id'], out['timestamp']))
+        out = {c: out[c][order] for c in wanted}
+
+    if as_arrays:
+        return {c: out[c] for c in columns}
+    return list(zip(*(out[c].tolist() for c in columns)))
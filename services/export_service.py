@@ -0,0 +1,160 @@
+import csv
+import io
+from datetime import datetime
+from typing import Iterator, List, Optional, Sequence
+
+from sqlalchemy import Boolean, DateTime, Integer, Numeric, select
+
+from db.connection import SessionLocal
+from services.pagination import STREAM_CHUNK_SIZE, Cursor, after_cursor, row_key
+
+# pyarrow solo hace falta para Arrow/Parquet; CSV funciona sin él
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = pq = None
+
+EXPORT_MEDIA_TYPES = {
+    'arrow':   'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet',
+    'csv':     'text/csv',
+}
+# Filas por row group de Parquet (se acumulan varios lotes del cursor)
+PARQUET_ROW_GROUP = 65536
+
+def export_available(fmt: str) -> bool:
+    return fmt == 'csv' or pa is not None
+
+def arrow_schema(model) -> "pa.Schema":
+    """
+    Esquema Arrow con tipos reales por columna: DECIMAL pasa a float64
+    para que pandas lo lea como número y no como objeto.
+    """
+    fields = []
+    for col in model.__table__.columns:
+        if isinstance(col.type, DateTime):
+            typ = pa.timestamp('us')
+        elif isinstance(col.type, Boolean):
+            typ = pa.bool_()
+        elif isinstance(col.type, Integer):
+            typ = pa.int64()
+        elif isinstance(col.type, Numeric):
+            typ = pa.float64()
+        else:
+            typ = pa.string()
+        fields.append(pa.field(col.name, typ, nullable=col.nullable))
+    return pa.schema(fields)
+
+def rows_to_batch(schema: "pa.Schema", rows: Sequence[tuple]) -> "pa.RecordBatch":
+    # Transpone las tuplas del cursor a columnas tipadas
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+    arrays = []
+    for field, values in zip(schema, columns):
+        if pa.types.is_floating(field.type):
+            values = [None if v is None else float(v) for v in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+def iter_rows(model, start: datetime, end: datetime,
+              after: Optional[Cursor] = None) -> Iterator[List[tuple]]:
+    """
+    Lotes de tuplas en orden (timestamp, id) leídos con un cursor del
+    servidor, mezclados con el archivo frío si el rango llega hasta él.
+    Abre su propia sesión porque se consume en streaming.
+    """
+    # Importación diferida: archive_service importa este módulo
+    from services.archive_service import iter_archive, merge_batches
+    from services.sensor_config import SENSOR_NAMES
+
+    db = SessionLocal()
+    try:
+        stmt = (
+            select(*model.__table__.c)
+            .where(model.timestamp >= start, model.timestamp <= end, after_cursor(model, after))
+            .order_by(model.timestamp, model.id)
+            .execution_options(yield_per=STREAM_CHUNK_SIZE)
+        )
+        hot = ([tuple(row) for row in partition] for partition in db.execute(stmt).partitions())
+        cold = iter_archive(SENSOR_NAMES[model], start, end, after)
+        yield from merge_batches(hot, cold, row_key(model))
+    finally:
+        db.close()
+
+class _ChunkSink(io.RawIOBase):
+    """Destino de escritura que acumula bytes para irlos entregando."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        data = bytes(b)
+        self._chunks.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def stream_arrow(model, batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+    # Formato IPC de streaming: un mensaje por lote del cursor
+    schema = arrow_schema(model)
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for rows in batches:
+            writer.write_batch(rows_to_batch(schema, rows))
+            yield sink.drain()
+    yield sink.drain()
+
+def stream_parquet(model, batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+    schema = arrow_schema(model)
+    sink = _ChunkSink()
+    pending, pending_rows = [], 0
+    with pq.ParquetWriter(sink, schema, compression='snappy') as writer:
+        for rows in batches:
+            pending.append(rows_to_batch(schema, rows))
+            pending_rows += len(rows)
+            if pending_rows >= PARQUET_ROW_GROUP:
+                writer.write_table(pa.Table.from_batches(pending, schema))
+                pending, pending_rows = [], 0
+                yield sink.drain()
+        if pending:
+            writer.write_table(pa.Table.from_batches(pending, schema))
+    yield sink.drain()
+
+def stream_csv(model, batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    out = csv.writer(buf)
+    out.writerow([c.name for c in model.__table__.columns])
+    for rows in batches:
+        out.writerows(
+            [v.isoformat() if isinstance(v, datetime) else v for v in row]
+            for row in rows
+        )
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    yield buf.getvalue().encode()
+
+EXPORT_WRITERS = {
+    'arrow':   stream_arrow,
+    'parquet': stream_parquet,
+    'csv':     stream_csv,
+}
+
+def export_readings(model, start: datetime, end: datetime, fmt: str,
+                    after: Optional[Cursor] = None) -> Iterator[bytes]:
+    """
+    Exporta las lecturas del rango en el formato pedido, por lotes.
+    Con `after` sólo las posteriores a ese (timestamp, id).
+    """
+    return EXPORT_WRITERS[fmt](model, iter_rows(model, start, end, after))
@@ -1,18 +1,86 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.gas import GasSensor
-from schemas.gas import GasDataCreate   
+from schemas.gas import GasDataCreate, GasDataRead
+from services.archive_service import (
+    merge_archived_stats,
+    merge_archived_watermark,
+    read_archived_rows
+)
+from services.batch_utils import validate_batch, insert_batch, batch_result
+from services.export_service import export_readings
+from services.pagination import Cursor, get_page, stream_ndjson
+from services.stats_utils import query_stats, query_watermark
+from services.latest_cache import latest_cache, row_to_dict
+from services.live_feed import live_feed
+from services.online_stats import online_stats
+from services.rollup_service import apply_rollups
+from utils.metrics import INGESTED_READINGS
 
 def create_gas(db: Session, data: GasDataCreate) -> GasSensor:
-    obj = GasSensor(**data.dict())
+    row = data.dict()
+    obj = GasSensor(**row)
     db.add(obj)
+    apply_rollups(db, "gas", [row])
     db.commit()
     db.refresh(obj)
+    row = row_to_dict(obj)
+    latest_cache.update("gas", row)
+    online_stats.update("gas", row)
+    live_feed.publish("gas", row)
+    INGESTED_READINGS.inc("gas", "single")
     return obj
 
+def create_gas_batch(db: Session, items: list) -> dict:
+    valid, errors = validate_batch(GasDataCreate, "gas", items)
+    rows = [d.dict() for _, d in valid]
+    ids = insert_batch(db, GasSensor, "gas", rows)
+    latest_cache.update_many("gas", rows)
+    online_stats.update_many("gas", rows)
+    live_feed.publish_many("gas", rows)
+    return batch_result(ids, errors)
+
 def get_gas(db: Session, start, end) -> List[GasSensor]:
-    return (
+    hot = (
         db.query(GasSensor)
           .filter(GasSensor.timestamp >= start, GasSensor.timestamp <= end)
           .all()
     )
+    return read_archived_rows("gas", start, end) + hot
+
+def get_gas_stats(db: Session, start, end, fields, thresholds=None):
+    stats, risk = query_stats(db, GasSensor, fields, start, end, thresholds)
+    return merge_archived_stats("gas", stats, risk, start, end, fields, thresholds)
+
+def get_gas_watermark(db: Session, start, end):
+    watermark = query_watermark(db, GasSensor, start, end)
+    return merge_archived_watermark("gas", watermark, start, end)
+
+def get_gas_page(db: Session, after: Optional[Cursor], limit: int):
+    return get_page(db, GasSensor, after, limit)
+
+def stream_gas(after: Optional[Cursor]):
+    return stream_ndjson(GasSensor, GasDataRead, after)
+
+def export_gas(start: datetime, end: datetime, fmt: str, after: Optional[Cursor] = None):
+    return export_readings(GasSensor, start, end, fmt, after)
+
+# Versiones async: ejecutan la misma lógica sobre una AsyncSession
+# (run_sync), de modo que la E/S va por el driver asíncrono sin ocupar hilos.
+
+async def create_gas_async(db: AsyncSession, data):
+    return await db.run_sync(create_gas, data)
+
+async def create_gas_batch_async(db: AsyncSession, items: list) -> dict:
+    return await db.run_sync(create_gas_batch, items)
+
+async def get_gas_async(db: AsyncSession, start, end):
+    return await db.run_sync(get_gas, start, end)
+
+async def get_gas_page_async(db: AsyncSession, after: Optional[Cursor], limit: int):
+    return await db.run_sync(get_gas_page, after, limit)
+
+async def get_gas_stats_async(db: AsyncSession, start, end, fields, thresholds=None):
+    return await db.run_sync(get_gas_stats, start, end, fields, thresholds)
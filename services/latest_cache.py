@@ -0,0 +1,93 @@
+import threading
+from typing import Dict, Optional
+from sqlalchemy import desc, func
+from sqlalchemy.orm import Session
+
+class LatestCache:
+    """
+    Último valor por sensor y por system_id, en memoria del proceso.
+    Lo actualizan los create_* al escribir (write-through) y se rellena
+    desde la BD al arrancar o ante un fallo de caché.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latest: Dict[str, dict] = {}
+        self._by_system: Dict[str, Dict[str, dict]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def update(self, sensor: str, row: dict):
+        # Las lecturas pueden llegar desordenadas: sólo avanza si es más reciente
+        sid = str(row['system_id'])
+        if row['system_id'] != sid:
+            # La columna es String: normaliza lo que llega de los lotes
+            row = {**row, 'system_id': sid}
+        with self._lock:
+            cur = self._latest.get(sensor)
+            if cur is None or row['timestamp'] >= cur['timestamp']:
+                self._latest[sensor] = row
+            systems = self._by_system.setdefault(sensor, {})
+            cur = systems.get(sid)
+            if cur is None or row['timestamp'] >= cur['timestamp']:
+                systems[sid] = row
+
+    def update_many(self, sensor: str, rows):
+        for row in rows:
+            self.update(sensor, row)
+
+    def get(self, sensor: str, system_id: Optional[str] = None) -> Optional[dict]:
+        with self._lock:
+            if system_id is None:
+                row = self._latest.get(sensor)
+            else:
+                row = self._by_system.get(sensor, {}).get(str(system_id))
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return row
+
+    def clear(self):
+        with self._lock:
+            self._latest.clear()
+            self._by_system.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0,
+                'systems': {s: len(v) for s, v in self._by_system.items()},
+            }
+
+latest_cache = LatestCache()
+
+def row_to_dict(obj) -> dict:
+    # Misma forma que devolvía /latest al serializar la entidad ORM
+    return {c.name: getattr(obj, c.name) for c in obj.__table__.columns}
+
+def query_latest(db: Session, model, system_id: Optional[str] = None):
+    query = db.query(model)
+    if system_id is not None:
+        query = query.filter(model.system_id == str(system_id))
+    return query.order_by(desc(model.timestamp)).first()
+
+def warm_latest(db: Session, sensor: str, model):
+    """
+    Carga el último registro por system_id (y con ello el global)
+    usando el índice (system_id, timestamp).
+    """
+    newest = (
+        db.query(model.system_id, func.max(model.timestamp).label('ts'))
+          .group_by(model.system_id)
+          .subquery()
+    )
+    rows = (
+        db.query(model)
+          .join(newest, (model.system_id == newest.c.system_id) & (model.timestamp == newest.c.ts))
+          .all()
+    )
+    latest_cache.update_many(sensor, (row_to_dict(r) for r in rows))
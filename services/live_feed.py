@@ -0,0 +1,110 @@
+import asyncio
+import json
+import os
+import threading
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, Optional, Set
+
+# Tamaño de la cola de cada suscriptor; al llenarse se descarta lo más antiguo
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "100"))
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"No serializable: {type(value)}")
+
+class Subscriber:
+    def __init__(self, loop, sensors: Optional[Set[str]], systems: Optional[Set[str]]):
+        self.loop = loop
+        self.sensors = sensors
+        self.systems = systems
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=LIVE_QUEUE_SIZE)
+        self.dropped = 0
+
+    def wants(self, sensor: str, system_id: str) -> bool:
+        return (
+            (self.sensors is None or sensor in self.sensors)
+            and (self.systems is None or system_id in self.systems)
+        )
+
+    def offer(self, message: str):
+        # Se ejecuta en el loop del suscriptor: nunca bloquea al que publica
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+class LiveFeed:
+    """
+    Difunde cada lectura aceptada a los suscriptores (WebSocket / SSE).
+    Se publica desde los hilos de las rutas síncronas, así que la entrega
+    se hace con call_soon_threadsafe en el loop de cada suscriptor.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Set[Subscriber] = set()
+        self.published = 0
+        self._dropped_closed = 0
+
+    def subscribe(self, sensors=None, systems=None) -> Subscriber:
+        sub = Subscriber(asyncio.get_running_loop(), sensors, systems)
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.discard(sub)
+                self._dropped_closed += sub.dropped
+
+    def publish_many(self, sensor: str, rows: Iterable[dict]):
+        with self._lock:
+            subs = list(self._subscribers)
+        if not subs:
+            return
+        published = 0
+        for row in rows:
+            system_id = str(row['system_id'])
+            targets = [s for s in subs if s.wants(sensor, system_id)]
+            if not targets:
+                continue
+            if row['system_id'] != system_id:
+                row = {**row, 'system_id': system_id}
+            message = json.dumps({'sensor': sensor, 'data': row}, default=_json_default)
+            published += 1
+            for sub in targets:
+                try:
+                    sub.loop.call_soon_threadsafe(sub.offer, message)
+                except RuntimeError:
+                    # El loop del suscriptor ya se cerró
+                    self.unsubscribe(sub)
+        # Se publica desde varios hilos de trabajo: el contador va bajo el lock
+        with self._lock:
+            self.published += published
+
+    def publish(self, sensor: str, row: dict):
+        self.publish_many(sensor, [row])
+
+    def stats(self) -> dict:
+        with self._lock:
+            subs = list(self._subscribers)
+            dropped = self._dropped_closed
+            published = self.published
+        return {
+            'subscribers': len(subs),
+            'published': published,
+            'dropped': dropped + sum(s.dropped for s in subs),
+        }
+
+live_feed = LiveFeed()
+
+def parse_filter(value: Optional[str]) -> Optional[Set[str]]:
+    # "gas,particle" -> {"gas", "particle"}; vacío = sin filtro
+    if not value:
+        return None
+    return {v.strip() for v in value.split(",") if v.strip()}
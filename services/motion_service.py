@@ -1,18 +1,86 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.motion import MotionSensor
-from schemas.motion import MotionDataCreate  
+from schemas.motion import MotionDataCreate, MotionDataRead
+from services.archive_service import (
+    merge_archived_stats,
+    merge_archived_watermark,
+    read_archived_rows
+)
+from services.batch_utils import validate_batch, insert_batch, batch_result
+from services.export_service import export_readings
+from services.pagination import Cursor, get_page, stream_ndjson
+from services.stats_utils import query_stats, query_watermark
+from services.latest_cache import latest_cache, row_to_dict
+from services.live_feed import live_feed
+from services.online_stats import online_stats
+from services.rollup_service import apply_rollups
+from utils.metrics import INGESTED_READINGS
 
 def create_motion(db: Session, data: MotionDataCreate) -> MotionSensor:
-    obj = MotionSensor(**data.dict())
+    row = data.dict()
+    obj = MotionSensor(**row)
     db.add(obj)
+    apply_rollups(db, "motion", [row])
     db.commit()
     db.refresh(obj)
+    row = row_to_dict(obj)
+    latest_cache.update("motion", row)
+    online_stats.update("motion", row)
+    live_feed.publish("motion", row)
+    INGESTED_READINGS.inc("motion", "single")
     return obj
 
+def create_motion_batch(db: Session, items: list) -> dict:
+    valid, errors = validate_batch(MotionDataCreate, "motion", items)
+    rows = [d.dict() for _, d in valid]
+    ids = insert_batch(db, MotionSensor, "motion", rows)
+    latest_cache.update_many("motion", rows)
+    online_stats.update_many("motion", rows)
+    live_feed.publish_many("motion", rows)
+    return batch_result(ids, errors)
+
 def get_motion(db: Session, start, end) -> List[MotionSensor]:
-    return (
+    hot = (
         db.query(MotionSensor)
           .filter(MotionSensor.timestamp >= start, MotionSensor.timestamp <= end)
           .all()
     )
+    return read_archived_rows("motion", start, end) + hot
+
+def get_motion_stats(db: Session, start, end, fields, thresholds=None):
+    stats, risk = query_stats(db, MotionSensor, fields, start, end, thresholds)
+    return merge_archived_stats("motion", stats, risk, start, end, fields, thresholds)
+
+def get_motion_watermark(db: Session, start, end):
+    watermark = query_watermark(db, MotionSensor, start, end)
+    return merge_archived_watermark("motion", watermark, start, end)
+
+def get_motion_page(db: Session, after: Optional[Cursor], limit: int):
+    return get_page(db, MotionSensor, after, limit)
+
+def stream_motion(after: Optional[Cursor]):
+    return stream_ndjson(MotionSensor, MotionDataRead, after)
+
+def export_motion(start: datetime, end: datetime, fmt: str, after: Optional[Cursor] = None):
+    return export_readings(MotionSensor, start, end, fmt, after)
+
+# Versiones async: ejecutan la misma lógica sobre una AsyncSession
+# (run_sync), de modo que la E/S va por el driver asíncrono sin ocupar hilos.
+
+async def create_motion_async(db: AsyncSession, data):
+    return await db.run_sync(create_motion, data)
+
+async def create_motion_batch_async(db: AsyncSession, items: list) -> dict:
+    return await db.run_sync(create_motion_batch, items)
+
+async def get_motion_async(db: AsyncSession, start, end):
+    return await db.run_sync(get_motion, start, end)
+
+async def get_motion_page_async(db: AsyncSession, after: Optional[Cursor], limit: int):
+    return await db.run_sync(get_motion_page, after, limit)
+
+async def get_motion_stats_async(db: AsyncSession, start, end, fields, thresholds=None):
+    return await db.run_sync(get_motion_stats, start, end, fields, thresholds)
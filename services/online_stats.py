@@ -0,0 +1,175 @@
+import math
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from services.sensor_config import (
+    SENSOR_FIELDS, SENSOR_MODELS, SENSOR_THRESHOLDS, field_scales, quantize
+)
+
+class RunningStat:
+    """Media y varianza de Welford, min, max y excesos sobre el umbral en O(1)."""
+
+    __slots__ = ('n', 'mean', 'm2', 'min', 'max', 'exceed')
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.exceed = 0
+
+    def add(self, x: float, threshold: Optional[float] = None):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        if threshold is not None and x > threshold:
+            self.exceed += 1
+
+    def merge(self, other: "RunningStat"):
+        # Combinación de Chan et al. para agregar varios system_id
+        if not other.n:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.exceed += other.exceed
+
+    @classmethod
+    def from_aggregates(cls, n, total, sumsq, lo, hi, exceed) -> "RunningStat":
+        st = cls()
+        st.n = n
+        st.mean = total / n
+        st.m2 = max(sumsq - total * total / n, 0.0)
+        st.min, st.max, st.exceed = lo, hi, exceed
+        return st
+
+class OnlineStats:
+    """
+    Estadísticas del día en curso por sensor, campo y system_id, en memoria
+    del proceso. Las actualizan los create_* (como la caché de /latest),
+    cambian de periodo a medianoche y se reconstruyen desde la BD al arrancar.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._day: Dict[str, date] = {}
+        self._stats: Dict[str, Dict[Tuple[str, str], RunningStat]] = {}
+
+    def _current(self, sensor: str) -> Optional[Dict[Tuple[str, str], RunningStat]]:
+        # Sin reconstruir todavía: None para que se consulte la BD
+        if sensor not in self._day:
+            return None
+        today = date.today()
+        if self._day[sensor] != today:
+            self._day[sensor] = today
+            self._stats[sensor] = {}
+        return self._stats[sensor]
+
+    def update_many(self, sensor: str, rows: Iterable[dict]):
+        fields = SENSOR_FIELDS[sensor]
+        thresholds = SENSOR_THRESHOLDS[sensor]
+        scales = field_scales(sensor)
+        with self._lock:
+            current = self._current(sensor)
+            if current is None:
+                return
+            today = self._day[sensor]
+            for row in rows:
+                # Las lecturas de otros días no afectan al periodo en curso
+                if row['timestamp'].date() != today:
+                    continue
+                sid = str(row['system_id'])
+                for f in fields:
+                    st = current.get((f, sid))
+                    if st is None:
+                        st = current[(f, sid)] = RunningStat()
+                    st.add(float(quantize(row[f], scales[f])), thresholds.get(f))
+
+    def update(self, sensor: str, row: dict):
+        self.update_many(sensor, (row,))
+
+    def snapshot(self, sensor: str, fields: List[str], system_id: Optional[str] = None):
+        """
+        (stats, risk) del día con la forma de query_stats, más 'std' por
+        campo. None si aún no se ha reconstruido desde la BD.
+        """
+        with self._lock:
+            current = self._current(sensor)
+            if current is None:
+                return None
+            totals = {f: RunningStat() for f in fields}
+            for (f, sid), st in current.items():
+                if f in totals and (system_id is None or sid == str(system_id)):
+                    totals[f].merge(st)
+        count = totals[fields[0]].n if fields else 0
+        if not count:
+            base = {f: {'mean': None, 'min': None, 'max': None, 'std': None} for f in fields}
+            base['count'] = 0
+            return base, {f: 0 for f in SENSOR_THRESHOLDS[sensor] if f in fields}
+        stats = {
+            f: {
+                'mean': st.mean,
+                'min': st.min,
+                'max': st.max,
+                'std': math.sqrt(st.m2 / (st.n - 1)) if st.n > 1 else 0.0,
+            }
+            for f, st in totals.items()
+        }
+        stats['count'] = count
+        risk = {f: totals[f].exceed / count for f in SENSOR_THRESHOLDS[sensor] if f in fields}
+        return stats, risk
+
+    def rebuild(self, db: Session, sensor: str):
+        """Recalcula el día en curso con una consulta agregada por system_id."""
+        model = SENSOR_MODELS[sensor]
+        fields = SENSOR_FIELDS[sensor]
+        thresholds = SENSOR_THRESHOLDS[sensor]
+        today = date.today()
+        start = datetime.combine(today, time.min)
+        cols = [model.system_id, func.count()]
+        for f in fields:
+            c = getattr(model, f)
+            cols += [func.sum(c), func.sum(c * c), func.min(c), func.max(c)]
+            if f in thresholds:
+                cols.append(func.sum(case((c > thresholds[f], 1), else_=0)))
+        rows = (
+            db.query(*cols)
+              .filter(model.timestamp >= start, model.timestamp < start + timedelta(days=1))
+              .group_by(model.system_id)
+              .all()
+        )
+        current = {}
+        for row in rows:
+            sid, n, i = str(row[0]), int(row[1]), 2
+            for f in fields:
+                width = 5 if f in thresholds else 4
+                total, sumsq, lo, hi = (float(v) for v in row[i:i + 4])
+                exceed = int(row[i + 4] or 0) if f in thresholds else 0
+                current[(f, sid)] = RunningStat.from_aggregates(n, total, sumsq, lo, hi, exceed)
+                i += width
+        with self._lock:
+            self._day[sensor] = today
+            self._stats[sensor] = current
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                s: {'day': d.isoformat(), 'systems': len({sid for _, sid in self._stats[s]})}
+                for s, d in self._day.items()
+            }
+
+online_stats = OnlineStats()
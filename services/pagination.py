@@ -0,0 +1,126 @@
+import base64
+import heapq
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from db.connection import SessionLocal
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE     = 5000
+# Filas que el cursor del servidor entrega por cada viaje a la BD
+STREAM_CHUNK_SIZE = 1000
+
+Cursor = Tuple[datetime, str]
+
+def encode_cursor(timestamp: datetime, row_id: str) -> str:
+    raw = f"{timestamp.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Cursor]:
+    """
+    Convierte el token opaco en (timestamp, id). Lanza ValueError
+    si el token no es válido.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(ts), row_id
+    except Exception:
+        raise ValueError(f"Cursor inválido: {cursor}")
+
+def parse_since(since: Optional[str]) -> Optional[Cursor]:
+    """
+    Cursor legible "timestamp|id" (el id es opcional) para sincronizar
+    deltas: devuelve las filas posteriores. Lanza ValueError si no es válido.
+    """
+    if not since:
+        return None
+    ts, _, row_id = since.partition("|")
+    try:
+        return datetime.fromisoformat(ts), row_id
+    except ValueError:
+        raise ValueError(f"since inválido: {since}")
+
+def resolve_after(cursor: Optional[str], since: Optional[str]) -> Optional[Cursor]:
+    # cursor (opaco) y since (legible) son dos formas del mismo punto de partida
+    if cursor and since:
+        raise ValueError("Usa cursor o since, no ambos")
+    return decode_cursor(cursor) if cursor else parse_since(since)
+
+def after_cursor(model, after: Optional[Cursor]):
+    # Condición keyset sobre (timestamp, id). El `timestamp >= ts` inicial es
+    # sargable: MySQL y SQLite hacen un range seek en vez de recorrer el índice
+    if after is None:
+        return True
+    ts, row_id = after
+    return and_(
+        model.timestamp >= ts,
+        or_(
+            model.timestamp > ts,
+            and_(model.timestamp == ts, model.id > row_id),
+        ),
+    )
+
+def row_key(model):
+    # Clave (timestamp, id) de las tuplas con las columnas del modelo en orden
+    names = [c.name for c in model.__table__.columns]
+    ts, row_id = names.index("timestamp"), names.index("id")
+    return lambda row: (row[ts], row[row_id])
+
+def get_page(db: Session, model, after: Optional[Cursor], limit: int) -> Tuple[List, Optional[str]]:
+    """
+    Devuelve una página ordenada por (timestamp, id) y el cursor de la
+    siguiente, o None si no quedan más filas. Incluye el archivo frío
+    si el cursor queda antes de la ventana caliente.
+    """
+    # Importación diferida: archive_service importa este módulo
+    from services.archive_service import read_archived_page
+    from services.sensor_config import SENSOR_NAMES
+
+    rows = (
+        db.query(model)
+          .filter(after_cursor(model, after))
+          .order_by(model.timestamp, model.id)
+          .limit(limit + 1)
+          .all()
+    )
+    cold = read_archived_page(SENSOR_NAMES[model], after, limit + 1)
+    if cold:
+        rows = list(heapq.merge(cold, rows, key=lambda r: (r.timestamp, r.id)))[:limit + 1]
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].timestamp, rows[-1].id)
+
+def stream_ndjson(model, schema, after: Optional[Cursor]) -> Iterator[bytes]:
+    """
+    Emite una línea JSON por fila leyendo con un cursor del servidor,
+    archivo frío incluido. Abre su propia sesión porque se consume
+    después de que el handler haya retornado.
+    """
+    # Importación diferida: archive_service importa este módulo
+    from services.archive_service import iter_archive, merge_batches
+    from services.sensor_config import SENSOR_NAMES
+
+    names = [c.name for c in model.__table__.columns]
+    db = SessionLocal()
+    try:
+        stmt = (
+            select(*model.__table__.c)
+            .where(after_cursor(model, after))
+            .order_by(model.timestamp, model.id)
+            .execution_options(yield_per=STREAM_CHUNK_SIZE)
+        )
+        hot = ([tuple(row) for row in partition] for partition in db.execute(stmt).partitions())
+        cold = iter_archive(SENSOR_NAMES[model], datetime.min, datetime.max, after)
+        for partition in merge_batches(hot, cold, row_key(model)):
+            yield b"".join(
+                schema.model_validate(dict(zip(names, row))).model_dump_json().encode() + b"\n"
+                for row in partition
+            )
+    finally:
+        db.close()
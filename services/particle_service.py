@@ -1,18 +1,86 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.particle import ParticleSensor
-from schemas.particle import ParticleDataCreate   
+from schemas.particle import ParticleDataCreate, ParticleDataRead
+from services.archive_service import (
+    merge_archived_stats,
+    merge_archived_watermark,
+    read_archived_rows
+)
+from services.batch_utils import validate_batch, insert_batch, batch_result
+from services.export_service import export_readings
+from services.pagination import Cursor, get_page, stream_ndjson
+from services.stats_utils import query_stats, query_watermark
+from services.latest_cache import latest_cache, row_to_dict
+from services.live_feed import live_feed
+from services.online_stats import online_stats
+from services.rollup_service import apply_rollups
+from utils.metrics import INGESTED_READINGS
 
 def create_particle(db: Session, data: ParticleDataCreate) -> ParticleSensor:
-    obj = ParticleSensor(**data.dict())
+    row = data.dict()
+    obj = ParticleSensor(**row)
     db.add(obj)
+    apply_rollups(db, "particle", [row])
     db.commit()
     db.refresh(obj)
+    row = row_to_dict(obj)
+    latest_cache.update("particle", row)
+    online_stats.update("particle", row)
+    live_feed.publish("particle", row)
+    INGESTED_READINGS.inc("particle", "single")
     return obj
 
+def create_particle_batch(db: Session, items: list) -> dict:
+    valid, errors = validate_batch(ParticleDataCreate, "particle", items)
+    rows = [d.dict() for _, d in valid]
+    ids = insert_batch(db, ParticleSensor, "particle", rows)
+    latest_cache.update_many("particle", rows)
+    online_stats.update_many("particle", rows)
+    live_feed.publish_many("particle", rows)
+    return batch_result(ids, errors)
+
 def get_particle(db: Session, start, end) -> List[ParticleSensor]:
-    return (
+    hot = (
         db.query(ParticleSensor)
           .filter(ParticleSensor.timestamp >= start, ParticleSensor.timestamp <= end)
           .all()
     )
+    return read_archived_rows("particle", start, end) + hot
+
+def get_particle_stats(db: Session, start, end, fields, thresholds=None):
+    stats, risk = query_stats(db, ParticleSensor, fields, start, end, thresholds)
+    return merge_archived_stats("particle", stats, risk, start, end, fields, thresholds)
+
+def get_particle_watermark(db: Session, start, end):
+    watermark = query_watermark(db, ParticleSensor, start, end)
+    return merge_archived_watermark("particle", watermark, start, end)
+
+def get_particle_page(db: Session, after: Optional[Cursor], limit: int):
+    return get_page(db, ParticleSensor, after, limit)
+
+def stream_particle(after: Optional[Cursor]):
+    return stream_ndjson(ParticleSensor, ParticleDataRead, after)
+
+def export_particle(start: datetime, end: datetime, fmt: str, after: Optional[Cursor] = None):
+    return export_readings(ParticleSensor, start, end, fmt, after)
+
+# Versiones async: ejecutan la misma lógica sobre una AsyncSession
+# (run_sync), de modo que la E/S va por el driver asíncrono sin ocupar hilos.
+
+async def create_particle_async(db: AsyncSession, data):
+    return await db.run_sync(create_particle, data)
+
+async def create_particle_batch_async(db: AsyncSession, items: list) -> dict:
+    return await db.run_sync(create_particle_batch, items)
+
+async def get_particle_async(db: AsyncSession, start, end):
+    return await db.run_sync(get_particle, start, end)
+
+async def get_particle_page_async(db: AsyncSession, after: Optional[Cursor], limit: int):
+    return await db.run_sync(get_particle_page, after, limit)
+
+async def get_particle_stats_async(db: AsyncSession, start, end, fields, thresholds=None):
+    return await db.run_sync(get_particle_stats, start, end, fields, thresholds)
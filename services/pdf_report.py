@@ -1,11 +1,11 @@
 import io
-import os
-import tempfile
+import zlib
 from datetime import datetime
 from fpdf import FPDF
+from PIL import Image
 import matplotlib
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import matplotlib.dates as mdates
 
 class PDF(FPDF):
@@ -19,15 +19,33 @@ class PDF(FPDF):
         self.ln(5)
 
     def add_image_bytes(self, img_buf: io.BytesIO, w: float = 180):
-        tmp = tempfile.gettempdir()
-        path = os.path.join(tmp, f"{datetime.now().timestamp()}.png")
-        with open(path, "wb") as f:
-            f.write(img_buf.getbuffer())
-        self.image(path, w=w)
+        # FPDF sólo sabe leer imágenes de disco: registramos nosotros la
+        # imagen ya decodificada para que image() no toque el sistema de ficheros
+        name = f"mem_{len(self.images) + 1}"
+        img = Image.open(img_buf)
+        if img.mode != "RGB":
+            # Aplana la transparencia sobre fondo blanco
+            bg = Image.new("RGB", img.size, (255, 255, 255))
+            bg.paste(img, mask=img.getchannel("A") if "A" in img.getbands() else None)
+            img = bg
+        self.images[name] = {
+            'i': len(self.images) + 1,
+            'w': img.width,
+            'h': img.height,
+            'cs': 'DeviceRGB',
+            'bpc': 8,
+            'f': 'FlateDecode',
+            'data': zlib.compress(img.tobytes()),
+        }
+        self.image(name, w=w)
         self.ln(5)
 
+# Las gráficas usan la API orientada a objetos (Figure) y no el estado
+# global de pyplot, para poder generarse en paralelo sin interferencias.
+
 def generate_donut_plot(safe_count: int, crit_count: int, field_label: str):
-    fig, ax = plt.subplots(figsize=(4,4))
+    fig = Figure(figsize=(4,4))
+    ax = fig.subplots()
     ax.pie(
         [safe_count, crit_count],
         labels=['Seguro', 'Crítico'],
@@ -37,14 +55,14 @@ def generate_donut_plot(safe_count: int, crit_count: int, field_label: str):
     )
     ax.set_title(f"{field_label} (%)", fontsize=12)
     buf = io.BytesIO()
-    plt.tight_layout()
-    plt.savefig(buf, format='PNG', bbox_inches='tight')
-    plt.close(fig)
+    fig.tight_layout()
+    fig.savefig(buf, format='PNG', bbox_inches='tight')
     buf.seek(0)
     return buf
 
 def generate_line_plot(timestamps, values, field_label: str):
-    fig, ax = plt.subplots(figsize=(8,3))
+    fig = Figure(figsize=(8,3))
+    ax = fig.subplots()
     ax.plot(timestamps, values, marker='o', linestyle='-', alpha=0.8)
     ax.set_title(f"Evolución {field_label}", fontsize=12)
     ax.set_xlabel("Fecha / Hora")
@@ -54,24 +72,12 @@ def generate_line_plot(timestamps, values, field_label: str):
     ax.xaxis.set_major_formatter(mdates.DateFormatter('%d/%m %H:%M'))
     fig.autofmt_xdate(rotation=45, ha='right')
     buf = io.BytesIO()
-    plt.tight_layout()
-    plt.savefig(buf, format='PNG', bbox_inches='tight')
-    plt.close(fig)
+    fig.tight_layout()
+    fig.savefig(buf, format='PNG', bbox_inches='tight')
     buf.seek(0)
     return buf
 
-def sample_points(points: list[dict], count: int) -> list[dict]:
-    """
-    Toma 'count' puntos equiespaciados de la lista 'points'.
-    Si hay menos de 'count', devuelve todos.
-    """
-    n = len(points)
-    if n <= count or count <= 0:
-        return points
-    step = n / count
-    return [points[int(i * step)] for i in range(count)]
-
-def build_pdf_report(sensor_name, label, stats, risk, graphs):
+def build_pdf_report(sensor_name, label, stats, risk, graphs, data_as_of: datetime):
     # Sanitiza el label: reemplaza en‑dash por guión normal
     label_clean = label.replace('–', '-')
 
@@ -80,9 +86,10 @@ def build_pdf_report(sensor_name, label, stats, risk, graphs):
     pdf.title = f"Reporte {sensor_name} - {label_clean}"
     pdf.add_page()
 
-    # 1) Cabecera con fecha de generación
+    # 1) Cabecera con la marca de agua de los datos (no la hora de render:
+    #    el PDF se sirve desde caché mientras los datos no cambien)
     pdf.set_font("Arial", "", 11)
-    pdf.cell(0, 8, f"Generado: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}", ln=True)
+    pdf.cell(0, 8, f"Datos hasta: {data_as_of.strftime('%d/%m/%Y %H:%M:%S')}", ln=True)
     pdf.ln(3)
 
     # 2) Estadísticas y riesgo
@@ -110,8 +117,22 @@ def build_pdf_report(sensor_name, label, stats, risk, graphs):
         w = 90 if key.startswith("donut_") else 180
         pdf.add_image_bytes(buf, w=w)
 
-    # 4) Salida como bytes en Latin‑1
-    out = io.BytesIO()
-    out.write(pdf.output(dest='S').encode('latin-1', 'ignore'))
-    out.seek(0)
-    return out
+    # 4) Salida codificada en Latin‑1
+    return pdf.output(dest='S').encode('latin-1', 'ignore')
+
+CHART_RENDERERS = {
+    'donut': generate_donut_plot,
+    'line':  generate_line_plot,
+}
+
+def render_report(sensor_name, label, stats, risk, charts, data_as_of: datetime) -> bytes:
+    """
+    Genera las gráficas descritas en 'charts' ({clave: (tipo, *args)})
+    y monta el PDF completo. Pensada para ejecutarse en un proceso
+    del pool de renderizado, por eso recibe y devuelve datos planos.
+    """
+    graphs = {
+        key: CHART_RENDERERS[kind](*args)
+        for key, (kind, *args) in charts.items()
+    }
+    return build_pdf_report(sensor_name, label, stats, risk, graphs, data_as_of)
@@ -0,0 +1,67 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+
+from services.pdf_report import render_report
+from utils.metrics import REPORT_BUILD
+
+# Procesos dedicados al renderizado (0 = renderizar en el propio hilo)
+RENDER_WORKERS    = int(os.getenv("RENDER_WORKERS", str(min(os.cpu_count() or 2, 4))))
+# Informes admitidos a la vez (en cola o renderizándose)
+RENDER_QUEUE_SIZE = int(os.getenv("RENDER_QUEUE_SIZE", str(max(RENDER_WORKERS, 1) * 2)))
+RENDER_QUEUE_WAIT = float(os.getenv("RENDER_QUEUE_WAIT_S", "5"))
+RENDER_TIMEOUT    = float(os.getenv("RENDER_TIMEOUT_S", "120"))
+
+class RenderQueueFull(Exception):
+    pass
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(RENDER_QUEUE_SIZE)
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: no heredar hilos ni conexiones abiertas del servidor
+            _pool = ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def render_pdf(sensor_name, label, stats, risk, charts, data_as_of) -> bytes:
+    """
+    Renderiza gráficas y PDF en el pool de procesos, fuera del GIL del
+    servidor. Si la cola está llena más de RENDER_QUEUE_WAIT segundos
+    lanza RenderQueueFull. Cada informe ocupa un hueco de la cola hasta
+    que el proceso termina, aunque la petición haya agotado RENDER_TIMEOUT.
+    """
+    if RENDER_WORKERS <= 0:
+        with REPORT_BUILD.time("pdf", sensor_name.lower()):
+            return render_report(sensor_name, label, stats, risk, charts, data_as_of)
+    if not _slots.acquire(timeout=RENDER_QUEUE_WAIT):
+        raise RenderQueueFull("Demasiados informes en cola, reintenta más tarde")
+    try:
+        future = get_pool().submit(render_report, sensor_name, label, stats, risk, charts, data_as_of)
+    except BaseException:
+        _slots.release()
+        raise
+    # El hueco se libera cuando el trabajo termina de verdad, no cuando esta
+    # petición deja de esperar: con timeouts la cota sigue limitando el trabajo real
+    future.add_done_callback(lambda _: _slots.release())
+    with REPORT_BUILD.time("pdf", sensor_name.lower()):
+        try:
+            return future.result(timeout=RENDER_TIMEOUT)
+        except FuturesTimeout:
+            # Si aún no había empezado, se descarta (y libera el hueco)
+            future.cancel()
+            raise
@@ -0,0 +1,136 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Hashable
+
+REPORT_CACHE_DIR    = os.getenv("REPORT_CACHE_DIR", ".report_cache")
+REPORT_CACHE_MAX_MB = float(os.getenv("REPORT_CACHE_MAX_MB", "200"))
+# Subir al cambiar el contenido de los informes para invalidar lo persistido
+REPORT_FORMAT_VERSION = 3
+
+class ReportCache:
+    """
+    Caché LRU en disco de artefactos de informe (PDF), acotada por tamaño.
+    La clave incluye la marca de agua de los datos, así que un cambio en
+    los datos produce una clave nueva y la antigua acaba expulsada.
+    Peticiones concurrentes de la misma clave generan el artefacto una vez.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._inflight: dict = {}
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        # Recupera lo persistido en disco, el más reciente al final
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".bin"):
+                st = os.stat(os.path.join(self.directory, name))
+                files.append((st.st_mtime, name[:-4], st.st_size))
+        for _, digest, size in sorted(files):
+            self._entries[digest] = size
+            self._size += size
+        self._evict()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, f"{digest}.bin")
+
+    @staticmethod
+    def _digest(key: Hashable) -> str:
+        return hashlib.sha1(repr((REPORT_FORMAT_VERSION, key)).encode()).hexdigest()
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._entries:
+            digest, size = self._entries.popitem(last=False)
+            self._size -= size
+            try:
+                os.remove(self._path(digest))
+            except FileNotFoundError:
+                pass
+
+    def _read(self, digest: str):
+        try:
+            with open(self._path(digest), "rb") as f:
+                data = f.read()
+            os.utime(self._path(digest))
+            return data
+        except FileNotFoundError:
+            return None
+
+    def _store(self, digest: str, data: bytes):
+        tmp = f"{self._path(digest)}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(digest))
+        with self._lock:
+            self._size += len(data) - self._entries.pop(digest, 0)
+            self._entries[digest] = len(data)
+            self._evict()
+
+    def get_or_build(self, key: Hashable, build: Callable[[], bytes]) -> bytes:
+        digest = self._digest(key)
+        with self._lock:
+            if digest in self._entries:
+                self._entries.move_to_end(digest)
+                cached = True
+            else:
+                cached = False
+                future = self._inflight.get(digest)
+                owner = future is None
+                if owner:
+                    future = Future()
+                    self._inflight[digest] = future
+
+        if cached:
+            data = self._read(digest)
+            if data is not None:
+                with self._lock:
+                    self.hits += 1
+                return data
+            # El fichero desapareció: se regenera
+            with self._lock:
+                self._size -= self._entries.pop(digest, 0)
+            return self.get_or_build(key, build)
+
+        if not owner:
+            # Otra petición ya lo está generando: esperar su resultado
+            with self._lock:
+                self.hits += 1
+            return future.result()
+
+        with self._lock:
+            self.misses += 1
+        try:
+            data = build()
+            self._store(digest, data)
+            future.set_result(data)
+            return data
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(digest, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'inflight': len(self._inflight),
+            }
+
+report_cache = ReportCache(REPORT_CACHE_DIR, int(REPORT_CACHE_MAX_MB * 1024 * 1024))
@@ -0,0 +1,147 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models.rollup import SensorRollup
+from services.downsample import lttb_indices
+from services.sensor_config import SENSOR_FIELDS, SENSOR_THRESHOLDS
+from utils.metrics import REPORT_BUILD
+
+# Puntos de las gráficas de línea del PDF por periodo
+LINE_POINTS = {'today': 96, 'last7': 168, 'month': 186, 'lastmonth': 186}
+# Etiquetas de las gráficas distintas de field.upper()
+CHART_LABELS = {'intensity': 'Intensidad'}
+
+class ReportFrame:
+    """
+    Rollups de un periodo cargados una sola vez en matrices float64
+    contiguas (campo × bucket). Estadísticas, riesgo y series salen de
+    operaciones vectorizadas, con coste lineal en el número de buckets.
+    """
+
+    def __init__(self, sensor: str, times: np.ndarray, samples: np.ndarray,
+                 total: np.ndarray, lo: np.ndarray, hi: np.ndarray, exceed: np.ndarray):
+        self.sensor = sensor
+        self.fields: List[str] = SENSOR_FIELDS[sensor]
+        self.times = times          # datetime64[us], (buckets,)
+        self.samples = samples      # (campos, buckets)
+        self.total = total
+        self.lo = lo                # NaN donde el campo no tiene bucket
+        self.hi = hi
+        self.exceed = exceed
+
+    @classmethod
+    def from_rows(cls, sensor: str, rows) -> "ReportFrame":
+        fields = SENSOR_FIELDS[sensor]
+        if not rows:
+            empty = np.zeros((len(fields), 0))
+            return cls(sensor, np.array([], dtype='datetime64[us]'),
+                       empty, empty, empty, empty, empty)
+        names, buckets, samples, total, lo, hi, exceed = zip(*rows)
+        times, b_idx = np.unique(np.array(buckets, dtype='datetime64[us]'), return_inverse=True)
+        uniq, f_inv = np.unique(np.array(names), return_inverse=True)
+        f_idx = np.array([fields.index(u) for u in uniq])[f_inv]
+
+        shape = (len(fields), len(times))
+        def grid(values, fill):
+            out = np.full(shape, fill, dtype=np.float64)
+            out[f_idx, b_idx] = np.asarray(values, dtype=np.float64)
+            return out
+        return cls(sensor, times, grid(samples, 0.0), grid(total, 0.0),
+                   grid(lo, np.nan), grid(hi, np.nan), grid(exceed, 0.0))
+
+    @property
+    def count(self) -> int:
+        return int(self.samples[0].sum()) if len(self.fields) else 0
+
+    def stats_and_risk(self) -> Tuple[dict, dict]:
+        """(stats, risk) con la misma forma que query_stats."""
+        thresholds = SENSOR_THRESHOLDS[self.sensor]
+        count = self.count
+        if count == 0:
+            stats = {f: {'mean': None, 'min': None, 'max': None} for f in self.fields}
+            stats['count'] = 0
+            return stats, {f: 0 for f in thresholds}
+        n = self.samples.sum(axis=1)
+        means = self.total.sum(axis=1) / n
+        mins = np.nanmin(self.lo, axis=1)
+        maxs = np.nanmax(self.hi, axis=1)
+        exceed = self.exceed.sum(axis=1)
+        stats = {
+            f: {'mean': float(means[i]), 'min': float(mins[i]), 'max': float(maxs[i])}
+            for i, f in enumerate(self.fields)
+        }
+        stats['count'] = count
+        risk = {f: float(exceed[self.fields.index(f)]) / count for f in thresholds}
+        return stats, risk
+
+    def series(self, field: str, max_points: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Serie por bucket de un campo, reducida con LTTB a max_points. Es la
+        media, salvo en los buckets que superan el umbral: ahí va el máximo,
+        para que el pico no se diluya antes de reducir.
+        """
+        i = self.fields.index(field)
+        mask = self.samples[i] > 0
+        times = self.times[mask]
+        values = np.where(
+            self.exceed[i, mask] > 0,
+            self.hi[i, mask],
+            self.total[i, mask] / self.samples[i, mask],
+        )
+        if max_points and len(values) > max_points:
+            idx = lttb_indices(times.astype(np.int64) / 1e6, values, max_points)
+            times, values = times[idx], values[idx]
+        return times, values
+
+    def timeseries(self, max_points: Optional[int] = None) -> Dict[str, list]:
+        out = {}
+        for f in self.fields:
+            times, values = self.series(f, max_points)
+            xs = np.datetime_as_string(times, unit='s').tolist()
+            out[f] = [{'x': x, 'y': y} for x, y in zip(xs, values.tolist())]
+        return out
+
+    def pdf_charts(self, stats: dict, risk: dict, max_points: Optional[int]) -> dict:
+        """
+        Especificación de gráficas del PDF ({clave: (tipo, *args)}): donut
+        con los conteos exactos del periodo y línea reducida con LTTB.
+        """
+        charts = {}
+        count = stats['count']
+        for f in self.fields:
+            label = CHART_LABELS.get(f, f.upper())
+            times, values = self.series(f, max_points)
+            crit = round(risk.get(f, 0) * count)
+            charts[f"donut_{f}"] = ("donut", count - crit, crit, label)
+            charts[f"line_{f}"] = ("line", times.tolist(), values.tolist(), label)
+        return charts
+
+def load_report_frame(db: Session, sensor: str, start: datetime, end: datetime,
+                      granularity: str) -> ReportFrame:
+    """Lee los rollups del periodo en una consulta y los pasa a arrays."""
+    with REPORT_BUILD.time("report", sensor):
+        rows = db.execute(
+            select(
+                SensorRollup.field, SensorRollup.bucket, SensorRollup.samples,
+                SensorRollup.total, SensorRollup.min_value, SensorRollup.max_value,
+                SensorRollup.exceed,
+            )
+            .where(
+                SensorRollup.sensor == sensor,
+                SensorRollup.granularity == granularity,
+                SensorRollup.field.in_(SENSOR_FIELDS[sensor]),
+                SensorRollup.bucket >= start,
+                SensorRollup.bucket <= end,
+            )
+        ).all()
+        return ReportFrame.from_rows(sensor, rows)
+
+def rollup_report(db: Session, sensor: str, start: datetime, end: datetime,
+                  granularity: str, max_points: Optional[int] = None) -> dict:
+    frame = load_report_frame(db, sensor, start, end, granularity)
+    stats, risk = frame.stats_and_risk()
+    return {'stats': stats, 'risk': risk, 'timeseries': frame.timeseries(max_points)}
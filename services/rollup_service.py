@@ -0,0 +1,196 @@
+from datetime import datetime, time, timedelta
+from typing import Iterable, List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from models.rollup import SensorRollup
+from services.archive_service import archived_before
+from services.sensor_config import (
+    SENSOR_FIELDS, SENSOR_MODELS, SENSOR_THRESHOLDS, field_scales, quantize
+)
+
+GRANULARITIES = ('minute', 'hour', 'day')
+
+# Resolución de los informes por periodo: nunca más de unos miles de filas
+REPORT_GRANULARITY = {'today': 'minute', 'last7': 'hour', 'month': 'hour', 'lastmonth': 'hour'}
+
+def bucket_start(ts: datetime, granularity: str) -> datetime:
+    if granularity == 'minute':
+        return ts.replace(second=0, microsecond=0)
+    if granularity == 'hour':
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def rollup_deltas(sensor: str, rows: Iterable[dict]) -> List[dict]:
+    """
+    Agrega en memoria las lecturas nuevas por (campo, granularidad, bucket).
+    Los valores se redondean a la escala de su columna DECIMAL para que
+    los rollups coincidan con las filas guardadas.
+    """
+    fields = SENSOR_FIELDS[sensor]
+    thresholds = SENSOR_THRESHOLDS[sensor]
+    scales = field_scales(sensor)
+    acc = {}
+    for row in rows:
+        ts = row['timestamp']
+        values = [float(quantize(row[f], scales[f])) for f in fields]
+        for gran in GRANULARITIES:
+            b = bucket_start(ts, gran)
+            for f, v in zip(fields, values):
+                U = thresholds.get(f)
+                over = 1 if U is not None and v > U else 0
+                cur = acc.get((f, gran, b))
+                if cur is None:
+                    acc[(f, gran, b)] = [1, v, v, v, over]
+                else:
+                    cur[0] += 1
+                    cur[1] += v
+                    cur[2] = min(cur[2], v)
+                    cur[3] = max(cur[3], v)
+                    cur[4] += over
+    return [
+        {'sensor': sensor, 'field': f, 'granularity': gran, 'bucket': b,
+         'samples': n, 'total': total, 'min_value': lo, 'max_value': hi, 'exceed': over}
+        for (f, gran, b), (n, total, lo, hi, over) in acc.items()
+    ]
+
+def upsert_rollups(db: Session, deltas: List[dict]):
+    # INSERT ... ON DUPLICATE KEY UPDATE (MySQL) / ON CONFLICT (SQLite)
+    if not deltas:
+        return
+    # Orden fijo por clave primaria: las ingestas concurrentes bloquean las
+    # mismas filas del minuto y la hora en curso siempre en el mismo orden
+    deltas = sorted(deltas, key=lambda d: (d['sensor'], d['field'], d['granularity'], d['bucket']))
+    table = SensorRollup.__table__
+    if db.get_bind().dialect.name == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table).values(deltas)
+        new = stmt.inserted
+        stmt = stmt.on_duplicate_key_update(
+            samples=table.c.samples + new.samples,
+            total=table.c.total + new.total,
+            min_value=func.least(table.c.min_value, new.min_value),
+            max_value=func.greatest(table.c.max_value, new.max_value),
+            exceed=table.c.exceed + new.exceed,
+        )
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(deltas)
+        new = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[c.name for c in table.primary_key],
+            set_={
+                'samples': table.c.samples + new.samples,
+                'total': table.c.total + new.total,
+                'min_value': func.min(table.c.min_value, new.min_value),
+                'max_value': func.max(table.c.max_value, new.max_value),
+                'exceed': table.c.exceed + new.exceed,
+            },
+        )
+    db.execute(stmt)
+
+def apply_rollups(db: Session, sensor: str, rows: Iterable[dict]):
+    """
+    Actualiza los rollups dentro de la transacción de la ingesta;
+    el commit lo hace quien inserta las lecturas crudas.
+    """
+    upsert_rollups(db, rollup_deltas(sensor, rows))
+
+def backfill_rollups(db: Session, sensor: str, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None) -> int:
+    """
+    Recalcula los rollups desde la tabla cruda día a día, para que la
+    memoria no dependa del tamaño de la tabla. Devuelve los días procesados.
+    """
+    model = SENSOR_MODELS[sensor]
+    fields = SENSOR_FIELDS[sensor]
+    lo, hi = db.query(func.min(model.timestamp), func.max(model.timestamp)).one()
+    if lo is None:
+        return 0
+    # Los días ya archivados no están en la tabla cruda: sus rollups se conservan
+    boundary = archived_before(sensor)
+    first = max(filter(None, [start or lo, boundary]))
+    day = first.date()
+    last = (end or hi).date()
+    days = 0
+    while day <= last:
+        day_start = datetime.combine(day, time.min)
+        day_end = day_start + timedelta(days=1)
+        db.query(SensorRollup).filter(
+            SensorRollup.sensor == sensor,
+            SensorRollup.bucket >= day_start,
+            SensorRollup.bucket < day_end,
+        ).delete(synchronize_session=False)
+        rows = db.execute(
+            select(model.timestamp, *[getattr(model, f) for f in fields])
+            .where(model.timestamp >= day_start, model.timestamp < day_end)
+        ).mappings()
+        upsert_rollups(db, rollup_deltas(sensor, rows))
+        db.commit()
+        day += timedelta(days=1)
+        days += 1
+    return days
+
+# Tamaños de bucket admitidos por /{sensor}/series y su rollup
+SERIES_BUCKETS = {'1m': ('minute', timedelta(minutes=1)),
+                  '1h': ('hour', timedelta(hours=1)),
+                  '1d': ('day', timedelta(days=1))}
+SERIES_AGGS = ('mean', 'min', 'max', 'sum', 'count', 'exceed')
+MAX_SERIES_BUCKETS = 5000
+
+def parse_series_params(bucket: str, agg: str, start: datetime, end: datetime):
+    """
+    Valida bucket/agg y que el rango no supere MAX_SERIES_BUCKETS.
+    Lanza ValueError con el motivo.
+    """
+    if bucket not in SERIES_BUCKETS:
+        raise ValueError(f"bucket debe ser uno de {', '.join(SERIES_BUCKETS)}")
+    aggs = [a.strip() for a in agg.split(",") if a.strip()]
+    bad = [a for a in aggs if a not in SERIES_AGGS]
+    if bad or not aggs:
+        raise ValueError(f"agg debe ser una lista de {', '.join(SERIES_AGGS)}")
+    if end < start:
+        raise ValueError("end debe ser posterior a start")
+    granularity, step = SERIES_BUCKETS[bucket]
+    if (end - start) / step > MAX_SERIES_BUCKETS:
+        raise ValueError(
+            f"El rango pide más de {MAX_SERIES_BUCKETS} buckets de {bucket}; "
+            "usa un bucket mayor o acota start/end"
+        )
+    return granularity, aggs
+
+def query_series(db: Session, sensor: str, start: datetime, end: datetime,
+                 granularity: str, aggs: List[str], fields: Optional[List[str]] = None) -> dict:
+    """
+    Serie agregada por bucket leída de los rollups, en formato columnar:
+    {'t': [...], 'series': {campo: {agg: [...]}}}. Los buckets sin datos
+    no aparecen.
+    """
+    known = SENSOR_FIELDS[sensor]
+    fields = [f for f in fields if f in known] if fields else known
+    rows = db.execute(
+        select(
+            SensorRollup.bucket, SensorRollup.field, SensorRollup.samples,
+            SensorRollup.total, SensorRollup.min_value, SensorRollup.max_value,
+            SensorRollup.exceed,
+        )
+        .where(
+            SensorRollup.sensor == sensor,
+            SensorRollup.granularity == granularity,
+            SensorRollup.field.in_(fields),
+            SensorRollup.bucket >= bucket_start(start, granularity),
+            SensorRollup.bucket <= end,
+        )
+        .order_by(SensorRollup.bucket)
+    ).all()
+
+    buckets = sorted({r[0] for r in rows})
+    pos = {b: i for i, b in enumerate(buckets)}
+    series = {f: {a: [None] * len(buckets) for a in aggs} for f in fields}
+    for b, f, n, total, lo, hi, over in rows:
+        values = {'mean': total / n, 'min': lo, 'max': hi, 'sum': total,
+                  'count': n, 'exceed': over}
+        i = pos[b]
+        for a in aggs:
+            series[f][a][i] = values[a]
+    return {'t': [b.isoformat() for b in buckets], 'series': series}
@@ -0,0 +1,73 @@
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import Float, Numeric
+
+from models.gas import GasSensor
+from models.motion import MotionSensor
+from models.particle import ParticleSensor
+from models.camera import CameraCapture
+
+# Modelo, campos numéricos y umbrales críticos de cada sensor
+SENSOR_MODELS = {
+    'gas':      GasSensor,
+    'motion':   MotionSensor,
+    'particle': ParticleSensor,
+    'camera':   CameraCapture,
+}
+
+# Sensor de cada modelo, para los servicios genéricos que reciben el modelo
+SENSOR_NAMES = {model: sensor for sensor, model in SENSOR_MODELS.items()}
+
+SENSOR_FIELDS = {
+    'gas':      ['lpg', 'co', 'smoke'],
+    'motion':   ['intensity'],
+    'particle': ['pm1_0', 'pm2_5', 'pm10'],
+    'camera':   ['latency_ms'],
+}
+
+SENSOR_THRESHOLDS = {
+    'gas':      {'lpg': 800.0, 'co': 50.0, 'smoke': 300.0},
+    'motion':   {},
+    'particle': {'pm2_5': 35.0},
+    'camera':   {'latency_ms': 200.0},
+}
+
+_SCALES: Dict[str, Dict[str, Optional[int]]] = {}
+_LIMITS: Dict[str, Dict[str, Tuple[int, int]]] = {}
+
+def field_scales(sensor: str) -> Dict[str, Optional[int]]:
+    """Decimales de cada campo DECIMAL del sensor (None si no es DECIMAL)."""
+    if sensor not in _SCALES:
+        columns = SENSOR_MODELS[sensor].__table__.columns
+        _SCALES[sensor] = {
+            f: columns[f].type.scale
+            if isinstance(columns[f].type, Numeric) and not isinstance(columns[f].type, Float)
+            else None
+            for f in SENSOR_FIELDS[sensor]
+        }
+    return _SCALES[sensor]
+
+def field_limits(sensor: str) -> Dict[str, Tuple[int, int]]:
+    """(precisión, escala) de cada campo DECIMAL del sensor."""
+    if sensor not in _LIMITS:
+        columns = SENSOR_MODELS[sensor].__table__.columns
+        _LIMITS[sensor] = {
+            f: (columns[f].type.precision, scale)
+            for f, scale in field_scales(sensor).items() if scale is not None
+        }
+    return _LIMITS[sensor]
+
+def quantize(value, scale: Optional[int]):
+    # Mismo redondeo que la columna DECIMAL al guardar (mitad lejos de cero)
+    if scale is None or value is None:
+        return value
+    q = Decimal(repr(float(value))).quantize(Decimal(1).scaleb(-scale), rounding=ROUND_HALF_UP)
+    return float(q)
+
+def quantize_row(sensor: str, row: dict) -> dict:
+    """Redondea en sitio los campos DECIMAL de la fila a su escala."""
+    for f, scale in field_scales(sensor).items():
+        if scale is not None and f in row:
+            row[f] = quantize(row[f], scale)
+    return row
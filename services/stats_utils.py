@@ -1,26 +1,50 @@
-import pandas as pd
+from sqlalchemy import case, func
 
-def compute_stats(records, fields):
+def query_stats(db, model, fields, start, end, thresholds=None):
     """
-    Convierte a float cada valor Decimal antes de calcular mean/min/max.
+    Calcula mean/min/max/count y el riesgo por umbral en una sola
+    consulta agregada, sin materializar los registros.
+    Devuelve (stats, risk); con count 0 los valores son None.
     """
-    # Convertimos DECIMAL a float para evitar errores de dtype
-    df = pd.DataFrame([
-        { field: float(getattr(r, field)) for field in fields }
-        for r in records
-    ])
-    if df.empty:
+    thresholds = thresholds or {}
+    cols = [func.count()]
+    for f in fields:
+        c = getattr(model, f)
+        cols += [func.avg(c), func.min(c), func.max(c)]
+    for f, U in thresholds.items():
+        cols.append(func.sum(case((getattr(model, f) > U, 1), else_=0)))
+
+    row = (
+        db.query(*cols)
+          .filter(model.timestamp >= start, model.timestamp <= end)
+          .one()
+    )
+    count = int(row[0] or 0)
+    if count == 0:
         base = {f: {'mean': None, 'min': None, 'max': None} for f in fields}
         base['count'] = 0
-        return base
+        return base, {f: 0 for f in thresholds}
 
-    stats = {
-        f: {
-            'mean': float(df[f].mean()),
-            'min':   float(df[f].min()),
-            'max':   float(df[f].max())
-        }
-        for f in fields
+    stats = {}
+    for i, f in enumerate(fields):
+        mean, lo, hi = row[1 + 3*i: 4 + 3*i]
+        stats[f] = {'mean': float(mean), 'min': float(lo), 'max': float(hi)}
+    stats['count'] = count
+    offset = 1 + 3*len(fields)
+    risk = {
+        f: float(row[offset + i] or 0) / count
+        for i, f in enumerate(thresholds)
     }
-    stats['count'] = len(df)
-    return stats
+    return stats, risk
+
+def query_watermark(db, model, start, end):
+    """
+    (max timestamp, count) del periodo: identifica la versión de los
+    datos para cachear artefactos derivados.
+    """
+    max_ts, count = (
+        db.query(func.max(model.timestamp), func.count())
+          .filter(model.timestamp >= start, model.timestamp <= end)
+          .one()
+    )
+    return max_ts, int(count or 0)
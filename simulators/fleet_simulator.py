@@ -0,0 +1,217 @@
+import argparse
+import asyncio
+import math
+import random
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+
+import httpx
+
+# Flota de dispositivos virtuales sobre un solo bucle asyncio que envía
+# lecturas a la API real a un ritmo agregado objetivo. Ejemplo:
+#   python -m simulators.fleet_simulator --devices 5000 --rate 2000 --mode batch
+
+# Umbrales críticos (mismos que services.sensor_config)
+THRESHOLDS = {'lpg': 800.0, 'co': 50.0, 'smoke': 300.0, 'pm2_5': 35.0}
+# Reparto de lecturas entre sensores; las capturas salen de los movimientos
+SENSOR_WEIGHTS = {'gas': 0.4, 'particle': 0.4, 'motion': 0.2}
+CAPTURE_PROB = 0.5
+
+class Device:
+    """Un sistema físico con sus sensores: nivel base, fase diaria y excursiones."""
+
+    def __init__(self, system_id: int, rng: random.Random):
+        self.system_id = system_id
+        self.rng = rng
+        self.scale = rng.uniform(0.6, 1.2)
+        self.phase = rng.uniform(-1.5, 1.5)   # horas de desfase del ciclo diario
+        self.excursion = {}                   # campo -> lecturas restantes
+
+    def diurnal(self, now: datetime) -> float:
+        # Máximo hacia las 14 h y mínimo de madrugada
+        hour = now.hour + now.minute / 60 + self.phase
+        return 1 + 0.35 * math.sin(2 * math.pi * (hour - 8) / 24)
+
+    def value(self, field: str, base: float, now: datetime, excursion_prob: float) -> float:
+        level = base * self.scale * self.diurnal(now) * self.rng.gauss(1, 0.08)
+        left = self.excursion.get(field, 0)
+        if field in THRESHOLDS:
+            if left == 0 and self.rng.random() < excursion_prob:
+                left = self.rng.randint(3, 30)
+            if left:
+                self.excursion[field] = left - 1
+                level = THRESHOLDS[field] * self.rng.uniform(1.05, 1.6)
+        return round(max(level, 0.0), 2)
+
+    def reading(self, sensor: str, now: datetime, excursion_prob: float) -> dict:
+        ts = now.isoformat()
+        v = lambda f, base: self.value(f, base, now, excursion_prob)
+        if sensor == 'gas':
+            return {'timestamp': ts, 'lpg': v('lpg', 350), 'co': v('co', 18),
+                    'smoke': v('smoke', 120), 'system_id': self.system_id}
+        if sensor == 'particle':
+            pm25 = v('pm2_5', 14)
+            return {'timestamp': ts, 'pm1_0': round(pm25 * 0.6, 2), 'pm2_5': pm25,
+                    'pm10': round(pm25 * 1.8, 2), 'system_id': self.system_id}
+        detected = self.rng.random() < 0.3 * self.diurnal(now)
+        return {'timestamp': ts, 'motion_detected': detected,
+                'intensity': round(self.rng.uniform(3, 10) if detected else self.rng.uniform(0, 1), 2),
+                'system_id': self.system_id}
+
+    def capture(self, motion_id: str, now: datetime) -> dict:
+        return {'timestamp': now.isoformat(), 'image_path': f"/uploads/img_{uuid.uuid4().hex}.jpg",
+                'motion_id': motion_id, 'latency_ms': int(self.rng.lognormvariate(4.6, 0.4)),
+                'system_id': self.system_id}
+
+class Fleet:
+    def __init__(self, client: httpx.AsyncClient, args):
+        self.client = client
+        self.args = args
+        self.rng = random.Random(args.random_seed)
+        self.devices = [Device(args.first_system_id + i, self.rng) for i in range(args.devices)]
+        self.inflight = asyncio.Semaphore(args.concurrency)
+        self.buffers = defaultdict(list)      # sensor -> [(device, lectura)]
+        self.tasks = set()
+        self.sent = defaultdict(int)
+        self.errors = 0
+        self.dropped = 0
+        self.latencies = []
+
+    def _spawn(self, coro, readings: int) -> bool:
+        # Contrapresión: con la API lenta las tareas pendientes no crecen sin
+        # límite; lo que no cabe se descarta y se cuenta
+        if len(self.tasks) >= self.args.max_pending:
+            coro.close()
+            self.dropped += readings
+            return False
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return True
+
+    async def _post(self, path: str, body):
+        async with self.inflight:
+            t0 = time.perf_counter()
+            try:
+                r = await self.client.post(path, json=body)
+            except httpx.HTTPError:
+                self.errors += 1
+                return None
+            self.latencies.append((time.perf_counter() - t0) * 1000)
+            if r.status_code >= 400:
+                self.errors += 1
+                return None
+            return r.json()
+
+    async def _send_single(self, sensor: str, device: Device, body: dict):
+        res = await self._post(f"/{sensor}/", body)
+        if res is None:
+            return
+        self.sent[sensor] += 1
+        if sensor == 'motion':
+            self._maybe_capture([(device, body)], [res['id']])
+
+    async def _send_batch(self, sensor: str, items):
+        res = await self._post(f"/{sensor}/batch", [body for _, body in items])
+        if res is None:
+            return
+        self.sent[sensor] += res['inserted']
+        self.errors += len(res['errors'])
+        if sensor == 'motion':
+            failed = {e['index'] for e in res['errors']}
+            ok = [it for i, it in enumerate(items) if i not in failed]
+            self._maybe_capture(ok, res['ids'])
+
+    def _maybe_capture(self, items, ids):
+        # Capturas ligadas a ids reales de movimiento devueltos por la API
+        now = datetime.now()
+        for (device, body), motion_id in zip(items, ids):
+            if body['motion_detected'] and self.rng.random() < CAPTURE_PROB:
+                self._emit('camera', device, device.capture(motion_id, now))
+
+    def _emit(self, sensor: str, device: Device, body: dict):
+        if self.args.mode == 'single':
+            self._spawn(self._send_single(sensor, device, body), 1)
+            return
+        buf = self.buffers[sensor]
+        buf.append((device, body))
+        if len(buf) >= self.args.batch_size:
+            self._flush(sensor)
+
+    def _flush(self, sensor: str):
+        items, self.buffers[sensor] = self.buffers[sensor], []
+        if items:
+            self._spawn(self._send_batch(sensor, items), len(items))
+
+    async def run(self):
+        sensors, weights = zip(*SENSOR_WEIGHTS.items())
+        tick = 0.05
+        start = prev = last_flush = last_report = time.perf_counter()
+        owed = 0.0
+        while time.perf_counter() - start < self.args.duration:
+            await asyncio.sleep(tick)
+            now_pc = time.perf_counter()
+            # Cubo de fichas: se generan las lecturas que corresponden al tiempo transcurrido
+            owed += self.args.rate * (now_pc - prev)
+            prev = now_pc
+            n, owed = int(owed), owed - int(owed)
+            now = datetime.now()
+            for _ in range(n):
+                device = self.rng.choice(self.devices)
+                sensor = self.rng.choices(sensors, weights)[0]
+                self._emit(sensor, device, device.reading(sensor, now, self.args.excursion_prob))
+            if now_pc - last_flush >= 1.0:
+                for s in list(self.buffers):
+                    self._flush(s)
+                last_flush = now_pc
+            if now_pc - last_report >= 5.0:
+                self.report(now_pc - start)
+                last_report = now_pc
+        for s in list(self.buffers):
+            self._flush(s)
+        while self.tasks:
+            await asyncio.gather(*list(self.tasks))
+            for s in list(self.buffers):
+                self._flush(s)
+        self.report(time.perf_counter() - start)
+
+    def report(self, elapsed: float):
+        total = sum(self.sent.values())
+        lat = sorted(self.latencies[-5000:])
+        p95 = lat[int(0.95 * (len(lat) - 1))] if lat else 0.0
+        detail = " ".join(f"{s}={n}" for s, n in sorted(self.sent.items()))
+        print(f"[{elapsed:6.1f}s] {total} lecturas ({total / max(elapsed, 1e-9):.0f}/s) "
+              f"{detail} errores={self.errors} descartadas={self.dropped} p95={p95:.1f}ms "
+              f"en vuelo={len(self.tasks)}")
+
+async def main_async(args):
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.api, limits=limits, timeout=60) as client:
+        await Fleet(client, args).run()
+
+def main():
+    parser = argparse.ArgumentParser(description="Flota de dispositivos simulados contra la API")
+    parser.add_argument("--api", default="http://127.0.0.1:8000")
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--first-system-id", type=int, default=1000,
+                        help="system_id del primer dispositivo; el resto son consecutivos")
+    parser.add_argument("--rate", type=float, default=200, help="lecturas por segundo en total")
+    parser.add_argument("--duration", type=float, default=60, help="segundos")
+    parser.add_argument("--mode", choices=("single", "batch"), default="single")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=64, help="peticiones HTTP en vuelo")
+    parser.add_argument("--max-pending", type=int, default=None,
+                        help="peticiones pendientes (en vuelo o esperando) antes de descartar "
+                             "lecturas; por defecto 4 x concurrency")
+    parser.add_argument("--excursion-prob", type=float, default=0.002,
+                        help="probabilidad por lectura de iniciar una excursión sobre el umbral")
+    parser.add_argument("--random-seed", type=int, default=None)
+    args = parser.parse_args()
+    if args.max_pending is None:
+        args.max_pending = 4 * args.concurrency
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
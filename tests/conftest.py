@@ -0,0 +1,62 @@
+import os
+import sys
+
+# La raíz del repo tiene __init__.py: pytest no la pone en sys.path por sí solo
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Antes de importar db.connection: nunca tocar la MySQL configurada en .env
+os.environ["DATABASE_URL"] = "sqlite://"
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from db.connection import Base, get_db
+import models.rollup  # noqa: F401  (registra sensor_rollup en Base.metadata)
+import services.sensor_config  # noqa: F401  (registra los modelos de sensores)
+
+@pytest.fixture
+def engine():
+    # Una sola conexión: los endpoints síncronos corren en otro hilo
+    eng = create_engine("sqlite://", poolclass=StaticPool,
+                        connect_args={"check_same_thread": False})
+    Base.metadata.create_all(eng)
+    yield eng
+    eng.dispose()
+
+@pytest.fixture
+def db(engine):
+    with Session(engine) as session:
+        yield session
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    from services import archive_service
+    monkeypatch.setattr(archive_service, "ARCHIVE_DIR", str(tmp_path))
+    archive_service._boundaries.clear()
+    yield tmp_path
+    archive_service._boundaries.clear()
+
+@pytest.fixture
+def client(engine, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy.orm import sessionmaker
+    from routes import camera, gas, motion, particle
+    from services import export_service, pagination
+
+    # Los streams abren su propia sesión al consumirse
+    for module in (pagination, export_service):
+        monkeypatch.setattr(module, "SessionLocal", sessionmaker(bind=engine))
+
+    app = FastAPI()
+    for module in (gas, motion, particle, camera):
+        app.include_router(module.router)
+
+    def session():
+        with Session(engine) as db:
+            yield db
+    app.dependency_overrides[get_db] = session
+    with TestClient(app) as c:
+        yield c
@@ -0,0 +1,72 @@
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+import pytest
+from scipy.stats import ttest_ind
+
+from models.gas import GasSensor
+from services import analysis_service
+from services.analysis_service import compare_periods
+from services.archive_service import archive_sensor
+from services.batch_utils import insert_batch
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    analysis_service._cache.clear()
+    yield
+    analysis_service._cache.clear()
+
+def day_rows(days_ago, values):
+    start = datetime.combine(date.today() - timedelta(days=days_ago), time(0, 30))
+    return [
+        {'timestamp': start + timedelta(minutes=5 * i), 'lpg': v, 'co': 1.0,
+         'smoke': 1.0, 'system_id': "1"}
+        for i, v in enumerate(values)
+    ]
+
+def lpg(rng, mean, n):
+    return np.round(rng.normal(mean, 4.0, n), 2).tolist()
+
+def test_welch_ttest_over_hot_and_archived_rows(db, archive_dir):
+    rng = np.random.default_rng(11)
+    old, recent, today = lpg(rng, 400, 40), lpg(rng, 405, 30), lpg(rng, 420, 25)
+    insert_batch(db, GasSensor, "gas", day_rows(5, old))
+    assert archive_sensor(db, "gas", datetime.now() - timedelta(days=4)) == 40
+    insert_batch(db, GasSensor, "gas", day_rows(3, recent))
+    insert_batch(db, GasSensor, "gas", day_rows(0, today))
+
+    result = compare_periods(db, "gas", "lpg", ['today', 'last7'])
+    by_period = {p['period']: p for p in result['periods']}
+    week = np.array(old + recent + today)
+    assert by_period['today']['n'] == 25
+    assert by_period['last7']['n'] == 95
+    assert by_period['today']['mean'] == pytest.approx(np.mean(today))
+    assert by_period['last7']['mean'] == pytest.approx(week.mean())
+    assert by_period['last7']['std'] == pytest.approx(week.std(ddof=1))
+
+    t, p = ttest_ind(today, week, equal_var=False)
+    assert result['ttest']['a'] == 'today' and result['ttest']['b'] == 'last7'
+    assert result['ttest']['t'] == pytest.approx(t)
+    assert result['ttest']['p'] == pytest.approx(p)
+    assert result['ttest']['significant'] == (p < 0.05)
+    assert result['anova'] is None
+
+def test_cache_follows_the_watermark(db):
+    insert_batch(db, GasSensor, "gas", day_rows(0, [1.0, 2.0, 3.0]))
+    insert_batch(db, GasSensor, "gas", day_rows(2, [4.0, 5.0]))
+    first = compare_periods(db, "gas", "lpg", ['today', 'last7'])
+    assert compare_periods(db, "gas", "lpg", ['today', 'last7']) is first
+
+    insert_batch(db, GasSensor, "gas", day_rows(1, [6.0]))
+    fresh = compare_periods(db, "gas", "lpg", ['today', 'last7'])
+    assert fresh is not first
+    assert fresh['periods'][1]['n'] == 6
+
+@pytest.mark.parametrize("sensor,field,periods", [
+    ("gas", "nope", ['today', 'last7']),
+    ("gas", "lpg", ['today']),
+    ("gas", "lpg", ['today', 'yesterday']),
+])
+def test_invalid_arguments(db, sensor, field, periods):
+    with pytest.raises(ValueError):
+        compare_periods(db, sensor, field, periods)
@@ -0,0 +1,121 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime, timedelta
+
+import pyarrow as pa
+import pytest
+
+from models.gas import GasSensor
+from services.archive_service import archive_sensor, merge_archived_stats, read_archive
+from services.batch_utils import insert_batch
+from services.columnar import read_columns
+from services.stats_utils import query_stats
+
+DAY = datetime(2026, 3, 1)
+START, END = DAY, DAY + timedelta(days=2)
+FIELDS = ['lpg', 'co', 'smoke']
+THRESHOLDS = {'lpg': 800.0, 'co': 50.0}
+
+def readings(minutes, base=0.0):
+    # Dos lecturas por minuto con el mismo timestamp: desempata el id
+    return [
+        {'timestamp': DAY + timedelta(minutes=m), 'lpg': base + m * 13.7,
+         'co': m * 0.9, 'smoke': 100.0 + k, 'system_id': "1"}
+        for m in minutes for k in (0, 1)
+    ]
+
+def keys(timestamps, ids):
+    return list(zip(timestamps, ids))
+
+def test_read_columns_merges_cold_and_late_hot_rows(db, archive_dir):
+    insert_batch(db, GasSensor, "gas", readings(range(30, 90)))
+    assert archive_sensor(db, "gas", DAY + timedelta(days=1)) == 120
+    # Llegada tardía anterior a lo archivado: se queda en caliente
+    insert_batch(db, GasSensor, "gas", readings(range(0, 30, 3)))
+    insert_batch(db, GasSensor, "gas", readings([24 * 60 + 5]))
+
+    rows = read_columns(db, "gas", ['timestamp', 'id', 'lpg'], START, END)
+    assert len(rows) == 120 + 20 + 2
+    assert rows == sorted(rows, key=lambda r: (r[0], r[1]))
+
+    arrays = read_columns(db, "gas", ['lpg', 'timestamp'], START, END, as_arrays=True)
+    assert list(arrays) == ['lpg', 'timestamp']
+    assert [float(v) for v in arrays['lpg']] == [r[2] for r in rows]
+
+def test_read_archive_sorts_across_parts(db, archive_dir):
+    insert_batch(db, GasSensor, "gas", readings(range(0, 60, 2)))
+    archive_sensor(db, "gas", DAY + timedelta(days=1))
+    insert_batch(db, GasSensor, "gas", readings(range(1, 60, 2)))
+    archive_sensor(db, "gas", DAY + timedelta(days=1))
+    parts = os.listdir(archive_dir / "gas" / f"date={DAY.date().isoformat()}")
+    assert len([p for p in parts if p.startswith("part-")]) == 2
+
+    table = read_archive("gas", START, END, ['timestamp', 'id', 'lpg'])
+    assert table.column_names == ['timestamp', 'id', 'lpg']
+    assert table.num_rows == 120
+    got = keys(table.column('timestamp').to_pylist(), table.column('id').to_pylist())
+    assert got == sorted(got)
+
+def test_merge_archived_stats_matches_full_range(db, archive_dir):
+    insert_batch(db, GasSensor, "gas", readings(range(0, 80)))
+    insert_batch(db, GasSensor, "gas", readings([24 * 60 + m for m in range(10)], base=500.0))
+    expected, expected_risk = query_stats(db, GasSensor, FIELDS, START, END, THRESHOLDS)
+
+    archive_sensor(db, "gas", DAY + timedelta(days=1))
+    hot, hot_risk = query_stats(db, GasSensor, FIELDS, START, END, THRESHOLDS)
+    assert hot['count'] == 20
+    stats, risk = merge_archived_stats("gas", hot, hot_risk, START, END, FIELDS, THRESHOLDS)
+
+    assert stats['count'] == expected['count'] == 180
+    for f in FIELDS:
+        assert stats[f]['mean'] == pytest.approx(expected[f]['mean'])
+        assert stats[f]['min'] == expected[f]['min']
+        assert stats[f]['max'] == expected[f]['max']
+    for f in THRESHOLDS:
+        assert risk[f] == pytest.approx(expected_risk[f])
+
+@pytest.fixture
+def half_archived(db, archive_dir):
+    # Día 1 archivado salvo una llegada tardía; día 2 en caliente
+    rows = readings(range(30, 90)) + readings([24 * 60 + m for m in range(0, 40, 2)])
+    insert_batch(db, GasSensor, "gas", rows)
+    archive_sensor(db, "gas", DAY + timedelta(days=1))
+    late = readings([5, 60])
+    insert_batch(db, GasSensor, "gas", late)
+    return sorted((r['timestamp'], r['id']) for r in rows + late)
+
+def test_pages_include_archived_rows(client, half_archived):
+    got, cursor = [], None
+    while True:
+        params = {'limit': 7, **({'cursor': cursor} if cursor else {})}
+        r = client.get("/gas/all", params=params)
+        got += [(datetime.fromisoformat(x['timestamp']), x['id']) for x in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert got == half_archived
+
+    ts, row_id = half_archived[49]
+    r = client.get("/gas/all", params={'limit': 5000, 'since': f"{ts.isoformat()}|{row_id}"})
+    assert [x['id'] for x in r.json()] == [i for _, i in half_archived[50:]]
+
+def test_ndjson_includes_archived_rows(client, half_archived):
+    r = client.get("/gas/all", params={'format': 'ndjson'})
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert [x['id'] for x in lines] == [i for _, i in half_archived]
+
+    ts, row_id = half_archived[10]
+    r = client.get("/gas/all", params={'format': 'ndjson', 'since': f"{ts.isoformat()}|{row_id}"})
+    assert [json.loads(line)['id'] for line in r.text.splitlines()] == [i for _, i in half_archived[11:]]
+
+def test_export_includes_archived_rows(client, half_archived):
+    r = client.get("/gas/export", params={'format': 'arrow'})
+    table = pa.ipc.open_stream(pa.py_buffer(r.content)).read_all()
+    assert table.column('id').to_pylist() == [i for _, i in half_archived]
+
+    ts, row_id = half_archived[99]
+    r = client.get("/gas/export", params={'format': 'csv', 'since': f"{ts.isoformat()}|{row_id}"})
+    ids = [row['id'] for row in csv.DictReader(io.StringIO(r.text))]
+    assert ids == [i for _, i in half_archived[100:]]
@@ -0,0 +1,79 @@
+import pytest
+
+from models.camera import CameraCapture
+from models.gas import GasSensor
+from services.batch_utils import MAX_BATCH_SIZE
+
+def gas(lpg=100.0, **extra):
+    return {'timestamp': "2026-10-17T10:00:00", 'lpg': lpg, 'co': 1.0, 'smoke': 1.0,
+            'system_id': 1, **extra}
+
+def errors_by_index(body):
+    return {e['index']: e['errors'] for e in body['errors']}
+
+def test_invalid_items_are_reported_per_index(client, db):
+    r = client.post("/gas/batch", json=[
+        gas(),
+        gas(lpg="mucho"),
+        "no es un objeto",
+        {'lpg': 1.0},
+        gas(lpg=9999.99),
+    ])
+    assert r.status_code == 200
+    body = r.json()
+    assert body['inserted'] == 2 and len(body['ids']) == 2
+    errors = errors_by_index(body)
+    assert sorted(errors) == [1, 2, 3]
+    assert errors[1][0].startswith("lpg:")
+    assert errors[2] == ['se esperaba un objeto JSON']
+    assert {e.split(":")[0] for e in errors[3]} == {'timestamp', 'co', 'smoke', 'system_id'}
+    assert db.query(GasSensor).count() == 2
+
+@pytest.mark.parametrize("sensor,field,ok,bad", [
+    ("gas", "lpg", [9999.99, -9999.99, 9999.994], [123456.789, 9999.995, -10000.0]),
+    ("particle", "pm2_5", [999999.99], [1e6, 999999.996]),
+])
+def test_values_outside_the_decimal_column_are_rejected(client, sensor, field, ok, bad):
+    fields = {'gas': ['lpg', 'co', 'smoke'], 'particle': ['pm1_0', 'pm2_5', 'pm10']}[sensor]
+    base = {'timestamp': "2026-10-17T10:00:00", 'system_id': 1, **{f: 1.0 for f in fields}}
+    r = client.post(f"/{sensor}/batch", json=[{**base, field: v} for v in ok + bad])
+    body = r.json()
+    assert r.status_code == 200
+    assert body['inserted'] == len(ok)
+    errors = errors_by_index(body)
+    assert sorted(errors) == list(range(len(ok), len(ok) + len(bad)))
+    assert all(e == [f"{field}: fuera de rango para DECIMAL({'6' if sensor == 'gas' else '8'},2)"]
+               for e in errors.values())
+
+def test_non_finite_values_are_rejected(client):
+    r = client.post("/gas/batch", content='[{"timestamp": "2026-10-17T10:00:00", "lpg": NaN, '
+                                          '"co": 1, "smoke": Infinity, "system_id": 1}]',
+                    headers={'Content-Type': 'application/json'})
+    assert r.status_code == 200
+    assert r.json()['inserted'] == 0
+    assert r.json()['errors'][0]['errors'] == [
+        "lpg: fuera de rango para DECIMAL(6,2)", "smoke: fuera de rango para DECIMAL(6,2)",
+    ]
+
+def test_camera_rejects_unknown_motion_ids_per_item(client, db):
+    motion = client.post("/motion/", json={'timestamp': "2026-10-17T10:00:00",
+                                           'motion_detected': True, 'intensity': 3.5,
+                                           'system_id': 1}).json()
+    capture = {'timestamp': "2026-10-17T10:00:01", 'image_path': "img/1.jpg",
+               'latency_ms': 120, 'system_id': 1}
+    r = client.post("/camera/batch", json=[
+        {**capture, 'motion_id': motion['id']},
+        {**capture, 'motion_id': "no-existe"},
+        {**capture, 'motion_id': motion['id']},
+    ])
+    assert r.status_code == 200
+    body = r.json()
+    assert body['inserted'] == 2
+    assert body['errors'] == [{'index': 1, 'errors': ["motion_id: no existe no-existe"]}]
+    assert db.query(CameraCapture).count() == 2
+
+def test_oversized_batch_is_rejected(client, db):
+    r = client.post("/gas/batch", json=[gas()] * (MAX_BATCH_SIZE + 1))
+    assert r.status_code == 413
+    assert db.query(GasSensor).count() == 0
+    assert client.post("/gas/batch", json=[gas()] * MAX_BATCH_SIZE).json()['inserted'] == MAX_BATCH_SIZE
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from services.downsample import lttb_indices
+
+def reference_lttb(x, y, n_out):
+    # LTTB en Python puro con los mismos límites de bucket
+    n = len(x)
+    edges = [int(e) for e in np.linspace(1, n - 1, n_out - 1)]
+    out, a = [0], 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            nxt = range(edges[i + 1], edges[i + 2])
+            cx = sum(x[j] for j in nxt) / len(nxt)
+            cy = sum(y[j] for j in nxt) / len(nxt)
+        else:
+            cx, cy = x[n - 1], y[n - 1]
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            area = abs((x[a] - cx) * (y[j] - y[a]) - (x[a] - x[j]) * (cy - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        a = best
+        out.append(a)
+    out.append(n - 1)
+    return out
+
+@pytest.mark.parametrize("n,n_out", [(1000, 50), (101, 7), (10, 3), (5000, 500)])
+def test_matches_reference(n, n_out):
+    rng = np.random.default_rng(n)
+    x = np.cumsum(rng.uniform(0.5, 2.0, n))
+    y = rng.normal(0, 1, n).cumsum()
+    idx = lttb_indices(x, y, n_out)
+    assert idx.tolist() == reference_lttb(x.tolist(), y.tolist(), n_out)
+
+def test_keeps_endpoints_and_increasing():
+    x = np.arange(2000, dtype=float)
+    y = np.sin(x / 50)
+    idx = lttb_indices(x, y, 100)
+    assert len(idx) == 100
+    assert idx[0] == 0 and idx[-1] == 1999
+    assert np.all(np.diff(idx) > 0)
+
+def test_keeps_isolated_spike():
+    x = np.arange(10_000, dtype=float)
+    y = np.zeros(10_000)
+    y[4321] = 950.0
+    assert 4321 in lttb_indices(x, y, 200)
+
+@pytest.mark.parametrize("n_out", [2, 10, 11])
+def test_small_series_returned_whole(n_out):
+    x = np.arange(10, dtype=float)
+    assert lttb_indices(x, x, n_out).tolist() == list(range(10))
@@ -0,0 +1,40 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from models.gas import GasSensor
+from services.latest_cache import latest_cache, query_latest, row_to_dict
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    latest_cache.clear()
+    yield
+    latest_cache.clear()
+
+def gas(timestamp, lpg=100.0, system_id=1):
+    return {'timestamp': timestamp, 'lpg': lpg, 'co': 1.0, 'smoke': 1.0, 'system_id': system_id}
+
+def test_batch_with_offset_timestamps_matches_stored_row(client, db):
+    # Entrada sin zona desde la ruta de una lectura
+    assert client.post("/gas/", json=gas("2026-10-17T10:00:00")).status_code == 200
+    r = client.post("/gas/batch", json=[
+        gas("2026-10-17T11:00:00Z", lpg=989.5568),
+        gas("2026-10-17T09:00:00+02:00", system_id=2),
+    ])
+    assert r.status_code == 200
+    assert r.json()['inserted'] == 2
+
+    cached = latest_cache.get("gas")
+    stored = row_to_dict(query_latest(db, GasSensor))
+    # Los lotes cachean float y la BD devuelve Decimal: mismo valor guardado
+    assert cached.keys() == stored.keys()
+    for k, v in stored.items():
+        assert cached[k] == (float(v) if isinstance(v, Decimal) else v)
+    assert cached['timestamp'] == datetime(2026, 10, 17, 11, 0)
+    assert cached['lpg'] == 989.56
+    assert latest_cache.get("gas", "2")['timestamp'] == datetime(2026, 10, 17, 9, 0)
+
+    # Un lote posterior sin zona sigue comparando contra lo cacheado
+    assert client.post("/gas/batch", json=[gas("2026-10-17T12:00:00")]).status_code == 200
+    assert latest_cache.get("gas")['timestamp'] == datetime(2026, 10, 17, 12, 0)
@@ -0,0 +1,92 @@
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+import pytest
+
+from models.gas import GasSensor
+from services.batch_utils import insert_batch
+from services.online_stats import OnlineStats, RunningStat
+from services.sensor_config import SENSOR_FIELDS, SENSOR_THRESHOLDS
+from services.stats_utils import query_stats
+
+def running(values, threshold=None):
+    st = RunningStat()
+    for v in values:
+        st.add(v, threshold)
+    return st
+
+def sample(n, seed=7):
+    # Media grande y varianza pequeña: donde la fórmula ingenua pierde precisión
+    return np.random.default_rng(seed).normal(1e6, 0.5, n)
+
+def test_welford_matches_numpy():
+    xs = sample(5000)
+    st = running(xs.tolist(), threshold=1e6)
+    assert st.n == 5000
+    assert st.mean == pytest.approx(xs.mean(), rel=1e-12)
+    assert st.m2 / (st.n - 1) == pytest.approx(xs.var(ddof=1), rel=1e-9)
+    assert (st.min, st.max) == (xs.min(), xs.max())
+    assert st.exceed == int((xs > 1e6).sum())
+
+@pytest.mark.parametrize("cut", [0, 1, 1234, 4999, 5000])
+def test_chan_merge_equals_whole(cut):
+    xs = sample(5000).tolist()
+    whole = running(xs, threshold=1e6)
+    merged = running(xs[:cut], threshold=1e6)
+    merged.merge(running(xs[cut:], threshold=1e6))
+    assert merged.n == whole.n
+    assert merged.mean == pytest.approx(whole.mean, rel=1e-12)
+    assert merged.m2 == pytest.approx(whole.m2, rel=1e-9)
+    assert (merged.min, merged.max, merged.exceed) == (whole.min, whole.max, whole.exceed)
+
+def test_from_aggregates():
+    xs = np.array([3.0, 7.5, 1.25, 9.0, 4.0])
+    st = RunningStat.from_aggregates(len(xs), xs.sum(), (xs * xs).sum(), xs.min(), xs.max(), 2)
+    ref = running(xs.tolist())
+    assert st.mean == pytest.approx(ref.mean)
+    assert st.m2 == pytest.approx(ref.m2)
+    assert (st.min, st.max, st.exceed) == (1.25, 9.0, 2)
+
+def today_rows(minutes, system_id):
+    start = datetime.combine(date.today(), time.min)
+    return [
+        {'timestamp': start + timedelta(minutes=m), 'lpg': 790.0 + (m % 23) * 1.337,
+         'co': (m * 7 % 11) * 4.9, 'smoke': 299.5 + (m % 3) * 0.5, 'system_id': system_id}
+        for m in minutes
+    ]
+
+def test_rebuild_and_updates_match_query_stats(db):
+    fields = SENSOR_FIELDS["gas"]
+    thresholds = SENSOR_THRESHOLDS["gas"]
+    stats = OnlineStats()
+    assert stats.snapshot("gas", fields) is None
+
+    insert_batch(db, GasSensor, "gas", today_rows(range(0, 300, 2), "1"))
+    insert_batch(db, GasSensor, "gas", today_rows(range(1, 300, 2), "2"))
+    stats.rebuild(db, "gas")
+    # Lecturas posteriores al arranque: rows ya cuantizadas por insert_batch
+    late = today_rows(range(300, 360), "1")
+    insert_batch(db, GasSensor, "gas", late)
+    stats.update_many("gas", late)
+
+    start = datetime.combine(date.today(), time.min)
+    end = start + timedelta(days=1) - timedelta(microseconds=1)
+    got, got_risk = stats.snapshot("gas", fields)
+    expected, expected_risk = query_stats(db, GasSensor, fields, start, end, thresholds)
+    assert got['count'] == expected['count'] == 360
+    for f in fields:
+        assert got[f]['mean'] == pytest.approx(expected[f]['mean'])
+        assert (got[f]['min'], got[f]['max']) == (expected[f]['min'], expected[f]['max'])
+    for f in thresholds:
+        assert got_risk[f] == pytest.approx(expected_risk[f])
+
+    # Por system_id, contra las lecturas guardadas
+    for system_id in ("1", "2"):
+        got, _ = stats.snapshot("gas", fields, system_id)
+        stored = db.query(GasSensor).filter(GasSensor.system_id == system_id).all()
+        assert got['count'] == len(stored)
+        for f in fields:
+            xs = np.array([float(getattr(r, f)) for r in stored])
+            assert got[f]['mean'] == pytest.approx(xs.mean())
+            assert got[f]['std'] == pytest.approx(xs.std(ddof=1))
+            assert (got[f]['min'], got[f]['max']) == (xs.min(), xs.max())
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.gas import GasSensor
+from services.pagination import (
+    decode_cursor,
+    encode_cursor,
+    get_page,
+    parse_since,
+    resolve_after,
+)
+
+T0 = datetime(2026, 3, 1, 8, 0, 0, 123456)
+
+def test_cursor_round_trip():
+    token = encode_cursor(T0, "abc|def")
+    assert "=" not in token
+    assert decode_cursor(token) == (T0, "abc|def")
+    assert decode_cursor(None) is None
+
+@pytest.mark.parametrize("bad", ["%%%", "bm9waXBl", encode_cursor(T0, "x")[:-3] + "!!"])
+def test_invalid_cursor_raises(bad):
+    with pytest.raises(ValueError):
+        decode_cursor(bad)
+
+def test_parse_since():
+    assert parse_since(f"{T0.isoformat()}|id-1") == (T0, "id-1")
+    assert parse_since(T0.isoformat()) == (T0, "")
+    assert parse_since(None) is None
+    with pytest.raises(ValueError):
+        parse_since("ayer")
+
+def test_cursor_and_since_are_exclusive():
+    with pytest.raises(ValueError):
+        resolve_after(encode_cursor(T0, "a"), T0.isoformat())
+    assert resolve_after(None, T0.isoformat()) == (T0, "")
+
+def test_pages_walk_every_row_once_across_timestamp_ties(db):
+    # Varias filas por timestamp: el desempate por id no debe perder ni repetir
+    rows = [
+        GasSensor(id=f"{i:04d}", timestamp=T0 + timedelta(seconds=i // 3),
+                  lpg=1, co=1, smoke=1, system_id="1")
+        for i in range(23)
+    ]
+    db.add_all(reversed(rows))
+    db.commit()
+
+    seen, after = [], None
+    while True:
+        page, token = get_page(db, GasSensor, after, 5)
+        seen.extend(r.id for r in page)
+        if token is None:
+            break
+        after = decode_cursor(token)
+    assert seen == [r.id for r in rows]
+
+def test_since_skips_up_to_the_given_row(db):
+    rows = [
+        GasSensor(id=f"{i:04d}", timestamp=T0 + timedelta(seconds=i // 2),
+                  lpg=1, co=1, smoke=1, system_id="1")
+        for i in range(6)
+    ]
+    db.add_all(rows)
+    db.commit()
+    page, _ = get_page(db, GasSensor, parse_since(f"{rows[2].timestamp.isoformat()}|{rows[2].id}"), 10)
+    assert [r.id for r in page] == ["0003", "0004", "0005"]
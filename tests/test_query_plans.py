@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from scripts.check_query_plans import check_plans
+from services.sensor_config import SENSOR_MODELS
+
+END = datetime(2026, 3, 15, 12)
+START = END - timedelta(days=7)
+
+@pytest.mark.parametrize("sensor", list(SENSOR_MODELS))
+@pytest.mark.parametrize("name", ["page", "stats", "series"])
+def test_range_queries_seek_the_index(engine, db, sensor, name):
+    results = [r for r in check_plans(engine, db, sensor, START, END) if r[0] == name]
+    assert results, f"{name} no ejecutó ningún SELECT"
+    for _, plan, ok in results:
+        assert ok, plan
+        # Búsqueda por rango, no recorrido del índice completo
+        assert any(d.startswith("SEARCH") and "USING" in d and ">" in d for d in plan), plan
+
+def test_every_hot_query_uses_an_index(engine, db):
+    for sensor in SENSOR_MODELS:
+        for name, plan, ok in check_plans(engine, db, sensor, START, END):
+            assert ok, (sensor, name, plan)
+
+def test_full_index_walk_is_rejected_for_ranges(engine, db):
+    # El OR sin conjunción sargable que usaba after_cursor recorría el índice
+    from sqlalchemy import and_, or_, select
+    from scripts.check_query_plans import explain
+    model = SENSOR_MODELS['gas']
+    stmt = (
+        select(model.id)
+        .where(or_(model.timestamp > START, and_(model.timestamp == START, model.id > "")))
+        .order_by(model.timestamp, model.id)
+    )
+    compiled = stmt.compile(engine)
+    params = tuple(compiled.params[k] for k in compiled.positiontup)
+    with engine.connect() as conn:
+        plan, ok = explain(conn, str(compiled), params, seek=True)
+    assert not ok, plan
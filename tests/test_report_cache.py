@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+
+import pytest
+
+from services.report_cache import ReportCache
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timeout esperando a los hilos"
+        time.sleep(0.005)
+
+def files(cache):
+    return sorted(name[:-4] for name in os.listdir(cache.directory) if name.endswith(".bin"))
+
+def concurrent_calls(cache, key, build, n):
+    """Lanza n get_or_build de la misma clave y espera a que todos estén dentro."""
+    results, errors = [None] * n, [None] * n
+
+    def call(i):
+        try:
+            results[i] = cache.get_or_build(key, build)
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    # Uno genera y el resto espera su resultado (cuentan como hit al esperar)
+    wait_until(lambda: cache.stats()['hits'] == n - 1 and cache.stats()['inflight'] == 1)
+    return threads, results, errors
+
+def test_concurrent_requests_build_once(tmp_path):
+    cache = ReportCache(str(tmp_path), 1 << 20)
+    release, calls = threading.Event(), []
+
+    def build():
+        calls.append(1)
+        release.wait(5)
+        return b"%PDF informe"
+
+    threads, results, errors = concurrent_calls(cache, ("gas", "today"), build, 8)
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert results == [b"%PDF informe"] * 8 and errors == [None] * 8
+    assert cache.stats()['misses'] == 1 and cache.stats()['inflight'] == 0
+    assert cache.get_or_build(("gas", "today"), build) == b"%PDF informe"
+    assert len(calls) == 1
+
+def test_waiters_receive_the_owner_exception(tmp_path):
+    cache = ReportCache(str(tmp_path), 1 << 20)
+    release = threading.Event()
+
+    def build():
+        release.wait(5)
+        raise RuntimeError("render caído")
+
+    threads, results, errors = concurrent_calls(cache, "k", build, 5)
+    release.set()
+    for t in threads:
+        t.join()
+    assert results == [None] * 5
+    assert all(isinstance(e, RuntimeError) and str(e) == "render caído" for e in errors)
+    assert len({id(e) for e in errors}) == 1
+    # Nada queda en vuelo ni en disco: la siguiente petición vuelve a generar
+    assert cache.stats()['inflight'] == 0 and files(cache) == []
+    assert cache.get_or_build("k", lambda: b"ok") == b"ok"
+
+def test_eviction_keeps_size_bounded_and_removes_files(tmp_path):
+    cache = ReportCache(str(tmp_path), 250)
+    for key in "abc":
+        cache.get_or_build(key, lambda: b"x" * 100)
+        assert cache.stats()['bytes'] <= 250
+    digest = {k: cache._digest(k) for k in "abcde"}
+    assert files(cache) == sorted([digest['b'], digest['c']])
+
+    # 'b' usado recientemente: la siguiente expulsión se lleva 'c'
+    cache.get_or_build("b", lambda: pytest.fail("b está en caché"))
+    cache.get_or_build("d", lambda: b"y" * 100)
+    assert files(cache) == sorted([digest['b'], digest['d']])
+    assert cache.stats()['bytes'] == 200
+
+    # Un artefacto mayor que el límite se expulsa entero
+    cache.get_or_build("e", lambda: b"z" * 300)
+    assert cache.stats()['bytes'] <= 250
+    assert digest['e'] not in files(cache)
+    assert files(cache) == sorted(cache._entries)
+
+def test_new_instance_reloads_entries_in_mtime_order(tmp_path):
+    cache = ReportCache(str(tmp_path), 1 << 20)
+    for i, key in enumerate(["viejo", "medio", "nuevo"]):
+        cache.get_or_build(key, lambda: b"p" * 100)
+        os.utime(cache._path(cache._digest(key)), (1_000_000 + i, 1_000_000 + i))
+
+    reloaded = ReportCache(str(tmp_path), 1 << 20)
+    assert list(reloaded._entries) == [cache._digest(k) for k in ["viejo", "medio", "nuevo"]]
+    assert reloaded.stats()['bytes'] == 300
+    assert reloaded.get_or_build("medio", lambda: pytest.fail("debe leerse de disco")) == b"p" * 100
+
+    # Leer 'medio' lo ha tocado: con un límite menor sólo sobrevive él
+    smaller = ReportCache(str(tmp_path), 150)
+    assert list(smaller._entries) == [cache._digest("medio")]
+    assert files(smaller) == [cache._digest("medio")]
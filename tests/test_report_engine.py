@@ -0,0 +1,51 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from models.gas import GasSensor
+from services.batch_utils import insert_batch
+from services.report_engine import LINE_POINTS, load_report_frame
+from services.rollup_service import REPORT_GRANULARITY
+from utils.time_utils import get_period_bounds_and_label
+
+SPIKE = 1500.0   # umbral de lpg: 800
+
+@pytest.fixture
+def spiky_gas(db):
+    # Tres días a 300-320 ppm cada 5 minutos y una sola lectura sobre el umbral
+    start = datetime.combine(date.today() - timedelta(days=3), time.min)
+    rows = [
+        {'timestamp': start + timedelta(minutes=5 * i), 'lpg': 300.0 + (i % 5) * 5,
+         'co': 10.0, 'smoke': 100.0, 'system_id': "1"}
+        for i in range(3 * 24 * 12)
+    ]
+    rows[400]['lpg'] = SPIKE
+    insert_batch(db, GasSensor, "gas", rows)
+    return rows
+
+@pytest.mark.parametrize("max_points", [None, 100, 30])
+def test_report_timeseries_keeps_threshold_spike(client, spiky_gas, max_points):
+    params = {'max_points': max_points} if max_points else {}
+    body = client.get("/gas/report/last7", params=params).json()
+    series = body['timeseries']['lpg']
+    assert body['stats']['lpg']['max'] == SPIKE
+    assert max(p['y'] for p in series) == SPIKE
+    if max_points:
+        assert len(series) <= max_points
+    # Sin exceso, el bucket sigue siendo la media
+    rest = sorted(p['y'] for p in series)[:-1]
+    assert 300.0 < rest[0] and rest[-1] < 320.0
+
+def test_pdf_line_chart_keeps_threshold_spike(db, spiky_gas):
+    start, end, _ = get_period_bounds_and_label('last7')
+    frame = load_report_frame(db, "gas", start, end, REPORT_GRANULARITY['last7'])
+    stats, risk = frame.stats_and_risk()
+    charts = frame.pdf_charts(stats, risk, LINE_POINTS['last7'])
+    kind, times, values, label = charts['line_lpg']
+    assert (kind, label) == ("line", "LPG")
+    assert max(values) == SPIKE
+    assert charts['donut_lpg'][1:3] == (stats['count'] - 1, 1)
+
+    # Con menos puntos que buckets el pico también sobrevive a LTTB
+    _, _, values = frame.pdf_charts(stats, risk, 20)['line_lpg'][:3]
+    assert len(values) == 20 and max(values) == SPIKE
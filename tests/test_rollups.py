@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from models.gas import GasSensor
+from models.rollup import SensorRollup
+from services.batch_utils import insert_batch
+from services.report_engine import load_report_frame
+from services.rollup_service import rollup_deltas, upsert_rollups
+from services.stats_utils import query_stats
+
+T0 = datetime(2026, 3, 1, 8, 0, 10)
+
+def reading(ts, lpg, co=1.0, smoke=1.0):
+    return {'timestamp': ts, 'lpg': lpg, 'co': co, 'smoke': smoke, 'system_id': "1"}
+
+def by_key(deltas):
+    return {(d['field'], d['granularity'], d['bucket']): d for d in deltas}
+
+def test_deltas_per_bucket():
+    rows = [
+        reading(T0, 100.0),
+        reading(T0 + timedelta(seconds=20), 900.0),      # mismo minuto, sobre el umbral
+        reading(T0 + timedelta(minutes=1), 50.0),
+    ]
+    d = by_key(rollup_deltas("gas", rows))
+    minute = d[('lpg', 'minute', T0.replace(second=0))]
+    assert (minute['samples'], minute['total'], minute['min_value'], minute['max_value'],
+            minute['exceed']) == (2, 1000.0, 100.0, 900.0, 1)
+    hour = d[('lpg', 'hour', T0.replace(minute=0, second=0))]
+    assert (hour['samples'], hour['total'], hour['exceed']) == (3, 1050.0, 1)
+    day = d[('co', 'day', T0.replace(hour=0, minute=0, second=0))]
+    assert day['samples'] == 3 and day['exceed'] == 0
+
+def test_deltas_use_the_stored_decimal_scale():
+    d = by_key(rollup_deltas("gas", [reading(T0, 989.5568), reading(T0, 1.005)]))
+    minute = d[('lpg', 'minute', T0.replace(second=0))]
+    assert minute['max_value'] == 989.56
+    assert minute['min_value'] == 1.01
+    assert minute['total'] == pytest.approx(990.57)
+
+def test_upsert_merges_existing_buckets(db):
+    upsert_rollups(db, rollup_deltas("gas", [reading(T0, 10.0), reading(T0, 30.0)]))
+    upsert_rollups(db, rollup_deltas("gas", [reading(T0, 5.0), reading(T0, 900.0)]))
+    db.commit()
+    row = db.execute(
+        select(SensorRollup).where(
+            SensorRollup.field == 'lpg', SensorRollup.granularity == 'minute'
+        )
+    ).scalar_one()
+    assert (row.samples, row.total, row.min_value, row.max_value, row.exceed) == (4, 945.0, 5.0, 900.0, 1)
+
+def test_upsert_orders_deltas_by_primary_key(db, monkeypatch):
+    statements = []
+    execute = db.execute
+    def spy(stmt, *args, **kwargs):
+        statements.append(stmt)
+        return execute(stmt, *args, **kwargs)
+    monkeypatch.setattr(db, "execute", spy)
+    rows = [reading(T0 + timedelta(hours=h), 1.0) for h in (3, 1, 2)]
+    deltas = rollup_deltas("gas", rows)
+    upsert_rollups(db, deltas)
+    params = statements[0].compile(dialect=db.get_bind().dialect).params
+    keys = [tuple(params[f"{c}_m{i}"] for c in ('sensor', 'field', 'granularity', 'bucket'))
+            for i in range(len(deltas))]
+    assert keys == sorted(keys)
+
+def test_rollups_agree_with_raw_statistics(db):
+    rows = [reading(T0 + timedelta(minutes=7 * i), 799.996 + i * 0.001, co=i * 1.337, smoke=300.004)
+            for i in range(40)]
+    insert_batch(db, GasSensor, "gas", rows)
+    start, end = T0.replace(hour=0, minute=0, second=0), T0 + timedelta(days=1)
+    fields = ['lpg', 'co', 'smoke']
+    thresholds = {'lpg': 800.0, 'co': 50.0, 'smoke': 300.0}
+    raw, raw_risk = query_stats(db, GasSensor, fields, start, end, thresholds)
+    stats, risk = load_report_frame(db, "gas", start, end, 'hour').stats_and_risk()
+    assert stats['count'] == raw['count'] == 40
+    for f in fields:
+        assert stats[f]['min'] == raw[f]['min']
+        assert stats[f]['max'] == raw[f]['max']
+        assert stats[f]['mean'] == pytest.approx(raw[f]['mean'])
+        assert risk[f] == pytest.approx(raw_risk[f])
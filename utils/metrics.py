@@ -0,0 +1,160 @@
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Sequence, Tuple
+
+# Métricas en memoria con exposición en formato de texto de Prometheus
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.label_names, k)} {v}" for k, v in items
+        ]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *labels, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # labels -> [conteo por cubo..., suma, total]
+        self._values: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            data = self._values.get(labels)
+            if data is None:
+                data = self._values[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    data[i] += 1
+                    break
+            data[-2] += value
+            data[-1] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, *labels)
+
+    def render(self):
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = self.header()
+        for k, data in items:
+            acc = 0
+            for b, n in zip(self.buckets, data):
+                acc += n
+                le = _labels(self.label_names, k, 'le="%s"' % b)
+                lines.append(f"{self.name}_bucket{le} {acc}")
+            le = _labels(self.label_names, k, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {data[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, k)} {data[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, k)} {data[-1]}")
+        return lines
+
+def render_metrics() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# --- Métricas de la aplicación ---
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Latencia de las peticiones HTTP",
+    ("method", "route", "filter_type", "status"),
+)
+INGESTED_READINGS = Counter(
+    "ingested_readings_total", "Lecturas ingeridas por sensor", ("sensor", "mode"),
+)
+SQL_LATENCY = Histogram(
+    "sql_query_duration_seconds", "Duración de las sentencias SQL",
+    ("operation", "table"),
+)
+REPORT_BUILD = Histogram(
+    "report_build_duration_seconds", "Duración de la construcción de informes y PDFs",
+    ("kind", "sensor"),
+)
+DB_POOL = Gauge("db_pool_connections", "Conexiones del pool por estado", ("engine", "state"))
+
+_SQL_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+[`\"]?(\w+)", re.IGNORECASE)
+
+def sql_labels(statement: str) -> Tuple[str, str]:
+    # Operación y tabla principal: cardinalidad acotada a las tablas del esquema
+    op = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    if op not in ("SELECT", "INSERT", "UPDATE", "DELETE"):
+        return op, ""
+    m = _SQL_TABLE.search(statement)
+    return op, (m.group(1) if m else "")
+
+def instrument_sqlalchemy():
+    """
+    Registra en todos los Engine (incluido el síncrono interno del motor
+    async) eventos que miden cada sentencia ejecutada.
+    """
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    if getattr(instrument_sqlalchemy, "_done", False):
+        return
+    instrument_sqlalchemy._done = True
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start")
+        if starts:
+            SQL_LATENCY.observe(time.perf_counter() - starts.pop(), *sql_labels(statement))
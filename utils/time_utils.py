@@ -16,6 +16,12 @@ def get_period_bounds_and_label(filter_type: str):
         start = datetime.combine(start_date, time.min)
         end   = datetime.combine(today, time.max)
         label = start_date.strftime('%B %Y')
+    elif filter_type == 'lastmonth':
+        end_date = today.replace(day=1) - timedelta(days=1)
+        start_date = end_date.replace(day=1)
+        start = datetime.combine(start_date, time.min)
+        end   = datetime.combine(end_date, time.max)
+        label = start_date.strftime('%B %Y')
     else:
         raise ValueError(f"Invalid filter type: {filter_type}")
     return start, end, label